@@ -16,6 +16,14 @@ AT_CMD_TYPE_READ = 1
 AT_CMD_TYPE_WRITE = 2
 AT_CMD_TYPE_EXEC = 3
 
+# maximum length of a command line (without "AT"), longer pipelines are split
+AT_CMD_MAX_LINE_LENGTH = 500
+
+# data after a "DOWNLOAD" or ">" prompt is written in chunks, with a pause after each chunk,
+# so the modem's UART buffer does not overflow
+AT_CMD_DATA_CHUNK = 100
+AT_CMD_DATA_PAUSE = 100     # ms
+
 unsolicited_responses = [
     "+CRING:",
     "+CREG:",
@@ -79,11 +87,6 @@ class AT_command:
         return f"AT_command(cmd: {self.cmd}, res: {str(self.res1)}/{str(self.res2)}, state: {self.state})"
 
 class Adapter:
-    _command_queue = []
-    _uart = None
-    _poll = None
-    _unsolicited_responses = []
-
     def __init__(self, uart):
         """Initializes the ATAdapter
 
@@ -93,7 +96,17 @@ class Adapter:
         self._uart = uart
         self._poll = select.poll()
         self._poll.register(uart, select.POLLIN)
+        self._command_queue = []
+        self._unsolicited_responses = []
+        self._running = []
+        self._current_str = ""
+        self._t0 = 0
+        self._timeout = 0
+        self._data_pos = None
+        self._data_t = 0
         self.logger = Logger("ATAdapter")
+        self.nmea_parser = None
+        self._nmea_rest = ""
 
     def queue_command(self, command:AT_command):
         """Queues an AT command for execution
@@ -105,25 +118,28 @@ class Adapter:
         self._command_queue.append(command)
         command.state = AT_CMD_STATE_SCHEDULED
 
-    def run(self):
-        """Executes all queued AT commands in the order they were queued
+    def run(self, pipeline:bool=False):
+        """Executes all queued AT commands in the order they were queued.
+        Each command is sent as soon as the final result code of the previous one has arrived.
+
+        Args:
+            pipeline (bool, optional): combine consecutive read and test commands into one command line
+                (e.g. "AT+CPSI?;+CSDP?"), see _pipelinable. Defaults to False.
         """
-        for cmd in self._command_queue:
-            self._execute_command(cmd)
+        while self._update(pipeline):
+            for event in self._poll.poll(self._poll_timeout()):
+                self._process_input(event[0])
 
-    def _execute_command(self, cmd: AT_command):
-        """Executes a single AT command
+    def _command_string(self, cmd: AT_command):
+        """Builds the command string without the "AT" prefix
 
         Args:
-            cmd (AT_command): The AT command to be executed
+            cmd (AT_command): The AT command
+
+        Returns:
+            str: command string (e.g. "+CPSI?")
         """
-        
-        # if command is not scheduled, return (eg. already executed or failed)
-        if cmd.state != AT_CMD_STATE_SCHEDULED:
-            return
-        
-        # Build the AT command string
-        c = "AT"+cmd.cmd
+        c = cmd.cmd
 
         if cmd.typ == AT_CMD_TYPE_TEST:
             c += "=?"
@@ -137,85 +153,277 @@ class Adapter:
         if cmd.typ == AT_CMD_TYPE_EXEC:
             pass
 
+        return c
+
+    def _pipelinable(self, cmd: AT_command):
+        """Checks if a command can be combined with others into one command line.
+        This is the case for read and test commands of extended syntax (their responses start with the command),
+        without data and afterrun.
+
+        Args:
+            cmd (AT_command): The AT command
+
+        Returns:
+            bool: True if the command can be combined, False otherwise
+        """
+        return (cmd.typ in (AT_CMD_TYPE_READ, AT_CMD_TYPE_TEST)) & cmd.cmd.startswith("+") & \
+            (cmd.data == "") & (cmd.afterrun == 0)
+
+    def _start_command(self, cmds: list):
+        """Sends AT commands to the modem in one command line
+
+        Args:
+            cmds (list of AT_command): The AT commands to be executed
+        """
+        
+        # Build the AT command string
+        c = "AT" + ";".join([self._command_string(cmd) for cmd in cmds])
+
         # Send the AT command to the modem (via UART)
         self._uart.write((c+"\r\n").encode("ascii"))
-        cmd.state = AT_CMD_STATE_RUNNING
+        for cmd in cmds:
+            cmd.state = AT_CMD_STATE_RUNNING
         self.logger.debug(">> " + c)
-        t0 = utime.ticks_ms()
-        t1 = 0
-        
-        # while state is running or running_wait and timeout or afterrun has not been reached
-        while \
-            ((utime.ticks_ms()-t0 < cmd.timeout) & (cmd.state == AT_CMD_STATE_RUNNING)) |  \
-            ((utime.ticks_ms()-t1 < cmd.afterrun) & (cmd.state == AT_CMD_STATE_RUNNING_WAIT)) :
-
-            # calculate timeout for poll
-            if cmd.state == AT_CMD_STATE_RUNNING:
-                poll_timeout = cmd.timeout-(utime.ticks_ms()-t0)
+        self._running = cmds
+        self._current_str = c
+        self._timeout = sum([cmd.timeout for cmd in cmds])
+        self._t0 = utime.ticks_ms()
+
+    def _update(self, pipeline:bool=False):
+        """Finishes the running commands if they have finished, failed, timed out or their afterrun has passed,
+        and starts the next scheduled commands
+
+        Args:
+            pipeline (bool, optional): combine consecutive read and test commands (see run). Defaults to False.
+
+        Returns:
+            bool: True if a command is running, False if the queue is done
+        """
+        if self._running:
+            self._send_data()
+            for cmd in self._running:
+                if (cmd.state == AT_CMD_STATE_RUNNING) and (utime.ticks_ms()-self._t0 >= self._timeout):
+                    cmd.state = AT_CMD_STATE_TIMEOUT
+                elif (cmd.state == AT_CMD_STATE_RUNNING_WAIT) and (utime.ticks_ms()-self._t0 >= cmd.afterrun):
+                    cmd.state = AT_CMD_STATE_FINISHED
+
+            if any([cmd.state in (AT_CMD_STATE_RUNNING, AT_CMD_STATE_RUNNING_WAIT) for cmd in self._running]):
+                return True
+
+            for cmd in self._running:
+                self.logger.info(cmd)
+            self._running = []
+            self._data_pos = None
+
+        # skip commands that are not scheduled (eg. already executed or failed)
+        while self._command_queue:
+            cmd = self._command_queue.pop(0)
+            if cmd.state != AT_CMD_STATE_SCHEDULED:
+                continue
+
+            # combine following commands, as long as their responses can be told apart by prefix
+            cmds = [cmd]
+            if pipeline and self._pipelinable(cmd):
+                length = len(self._command_string(cmd))
+                while self._command_queue:
+                    nxt = self._command_queue[0]
+                    length += len(self._command_string(nxt)) + 1
+                    if (not self._pipelinable(nxt)) or (nxt.state != AT_CMD_STATE_SCHEDULED) or \
+                        (nxt.cmd in [x.cmd for x in cmds]) or (length > AT_CMD_MAX_LINE_LENGTH):
+                        break
+                    cmds.append(self._command_queue.pop(0))
+
+            self._start_command(cmds)
+            return True
+        return False
+
+    def _poll_timeout(self):
+        """Calculates the time until the running commands time out or their afterrun has passed
+
+        Returns:
+            int: timeout for poll in ms
+        """
+        if not self._running:
+            return 0
+        limit = self._timeout if self._running[0].state == AT_CMD_STATE_RUNNING else self._running[0].afterrun
+        timeout = limit-(utime.ticks_ms()-self._t0)
+        if self._data_pos is not None:
+            timeout = min(timeout, AT_CMD_DATA_PAUSE-(utime.ticks_ms()-self._data_t))
+        return max(0, timeout)
+
+    def _send_data(self):
+        """Writes the next chunk of the running command's data, once the pause after the previous chunk has passed.
+        Writing chunk by chunk from _update keeps the adapter responsive (e.g. for the Scheduler) while data is sent.
+        """
+        if (self._data_pos is None) or (utime.ticks_ms()-self._data_t < AT_CMD_DATA_PAUSE):
+            return
+        data = self._running[0].data
+        self._uart.write(data[self._data_pos:self._data_pos+AT_CMD_DATA_CHUNK])
+        self._data_t = utime.ticks_ms()
+        self._data_pos += AT_CMD_DATA_CHUNK
+        if self._data_pos >= len(data):
+            self._data_pos = None
+
+    def _response_command(self, line: str):
+        """Finds the running command a response line belongs to
+
+        Args:
+            line (str): response line
+
+        Returns:
+            AT_command: command the line starts with or None
+        """
+        if len(self._running) == 1:
+            cmd = self._running[0]
+            return cmd if (cmd.cmd!="") & line.startswith(cmd.cmd) else None
+        for cmd in self._running:
+            if line.startswith(cmd.cmd + ":"):
+                return cmd
+        return None
+
+    def _process_input(self, stream):
+        """Reads UART input and assigns it to the running commands, the NMEA parser or the unsolicited responses
+
+        Args:
+            stream: UART object that has input available
+        """
+        running = self._running
+        for line in self._read_lines(stream):
+            self.logger.debug("<< " + line)
+            res_cmd = self._response_command(line) if running else None
+
+            # skip, if line is the command itself
+            if line == self._current_str:
+                pass
+
+            # NMEA sentences (streaming GNSS)
+            elif line[0] == "$":
+                if self.nmea_parser is not None:
+                    self.nmea_parser.feed(line)
+
+            # input without a running command
+            elif not running:
+                if any([line.startswith(x) for x in unsolicited_responses]):
+                    self._unsolicited_responses.append(line)
+
+            # typical responses (starts with command)
+            elif res_cmd is not None:
+                res_cmd.res1.append(line[len(res_cmd.cmd)+2:])
             
-            # calculate timeout for afterrun
-            elif cmd.state == AT_CMD_STATE_RUNNING_WAIT:
-                poll_timeout = cmd.afterrun-(utime.ticks_ms()-t1)
+            # if line is "OK", set state to finished or running_wait (for afterrun)
+            elif line in ["OK"]:
+                for cmd in running:
+                    if cmd.afterrun > 0:
+                        cmd.state = AT_CMD_STATE_RUNNING_WAIT
+                        self._t0 = utime.ticks_ms()
+                    else:
+                        cmd.state = AT_CMD_STATE_FINISHED
+                    self.logger.debug(cmd)
             
-            # read from uart
-            events = self._poll.poll(poll_timeout)
+            # if line is \x00, set state to finished_00
+            elif line in ["\x00"]:
+                for cmd in running:
+                    cmd.state = AT_CMD_STATE_FINISHED_00
+                    self.logger.debug(cmd)
+
+            # if line is "ERROR", set state to failed
+            # (the modem stops at the failing command of a command line, the commands before it have responded)
+            elif (line == "ERROR") | line.startswith("+CME ERROR"):
+                for cmd in running:
+                    cmd.state = AT_CMD_STATE_FINISHED if (len(running) > 1) & (len(cmd.res1) > 0) else AT_CMD_STATE_FAILED
+                    self.logger.debug(cmd)
             
-            # process uart inputs
-            for event in events:    
-                # format and split uart input
-                lines = [line.strip() for line in event[0].read().decode().split("\n") if line.strip()!=""]
-                for line in lines:
-                    self.logger.debug("<< " + line)
-
-                    # skip, if line is the command itself
-                    if line == c:
-                        pass
-
-                    # typical responses (starts with command)
-                    elif (cmd.cmd!="") & line.startswith(cmd.cmd):
-                        cmd.res1.append(line[len(cmd.cmd)+2:])
-                    
-                    # if line is "OK", set state to finished or running_wait (for afterrun)
-                    elif line in ["OK"]:
-                        if cmd.afterrun > 0:
-                            cmd.state = AT_CMD_STATE_RUNNING_WAIT
-                            t1 = utime.ticks_ms()
-                        else:
-                            cmd.state = AT_CMD_STATE_FINISHED
-                        self.logger.debug(cmd)
-                    
-                    # if line is \x00, set state to finished_00
-                    elif line in ["\x00"]:
-                        cmd.state = AT_CMD_STATE_FINISHED_00
-                        self.logger.debug(cmd)
-
-                    # if line is "ERROR", set state to failed
-                    elif line == "ERROR":
-                        cmd.state = AT_CMD_STATE_FAILED
-                        self.logger.debug(cmd)
-                    
-                    # if line is "DOWNLOAD" or ">", send data
-                    elif line in ["DOWNLOAD",">"]:
-                        for i in range(len(cmd.data)//100+1):
-                            self._uart.write(cmd.data[100*i:100*(i+1)])
-                            utime.sleep(0.1)
-                    
-                    else: 
-                        self.logger.debug("++ " + line)
-                        if any([line.startswith(x) for x in unsolicited_responses]):
-                            self._unsolicited_responses.append(line)
-                        else:
-                            cmd.res2.append(line)
-                        
-        if cmd.state == AT_CMD_STATE_RUNNING:
-            cmd.state = AT_CMD_STATE_TIMEOUT
-        elif cmd.state == AT_CMD_STATE_RUNNING_WAIT:
-            cmd.state = AT_CMD_STATE_FINISHED
-
-        self.logger.info(cmd)
+            # if line is "DOWNLOAD" or ">", start sending data (continued by _update, see _send_data)
+            elif line in ["DOWNLOAD",">"]:
+                self._data_pos = 0
+                self._data_t = utime.ticks_ms() - AT_CMD_DATA_PAUSE
+                self._send_data()
+            
+            else: 
+                self.logger.debug("++ " + line)
+                if any([line.startswith(x) for x in unsolicited_responses]):
+                    self._unsolicited_responses.append(line)
+                else:
+                    running[0].res2.append(line)
+
+    def _read_lines(self, stream):
+        """Reads from the UART and splits the input into lines
+
+        An incomplete NMEA sentence at the end of the input is kept and completed by the next read,
+        all other incomplete lines (e.g. the ">" prompt) are returned as they are.
+
+        Args:
+            stream: UART object that has input available
+
+        Returns:
+            list: stripped, non-empty lines
+        """
+        data = self._nmea_rest + stream.read().decode()
+        self._nmea_rest = ""
+        if not data.endswith("\n"):
+            i = data.rfind("\n") + 1
+            if data[i:].startswith("$"):
+                self._nmea_rest = data[i:]
+                data = data[:i]
+        return [line.strip() for line in data.split("\n") if line.strip()!=""]
+
+    def listen(self, duration:int):
+        """Processes UART input without executing a command, e.g. streamed NMEA sentences
+        and unsolicited responses
+
+        Args:
+            duration (int): time to listen in ms
+        """
+        t0 = utime.ticks_ms()
+        while utime.ticks_ms()-t0 < duration:
+            for event in self._poll.poll(max(0, duration-(utime.ticks_ms()-t0))):
+                self._process_input(event[0])
+
+    def pop_unsolicited_responses(self, prefix:str):
+        """Removes all unsolicited responses starting with prefix and returns them
+
+        Args:
+            prefix (str): prefix of the unsolicited responses (e.g. "*PSUTTZ:")
+
+        Returns:
+            list: unsolicited responses in the order they were received
+        """
+        res = [x for x in self._unsolicited_responses if x.startswith(prefix)]
+        for x in res:
+            self._unsolicited_responses.remove(x)
+        return res
 
     def print_command_queue(self):
-        """Prints the command queue
+        """Prints the commands that are still queued
         """
         for cmd in self._command_queue:
-            self.logger.info(cmd)
\ No newline at end of file
+            self.logger.info(cmd)
+
+
+class Scheduler:
+    def __init__(self, adapters:list):
+        """Initializes the scheduler, which polls the UARTs of several adapters in one poll set
+
+        Args:
+            adapters (list of Adapter): adapters of the modems (one per UART)
+        """
+        self.adapters = adapters
+        self._poll = select.poll()
+        for adapter in adapters:
+            self._poll.register(adapter._uart, select.POLLIN)
+        self.logger = Logger("Scheduler")
+
+    def run(self, pipeline:bool=False):
+        """Executes the queued AT commands of all adapters. The commands of each adapter are executed
+        in the order they were queued, commands of different adapters are executed concurrently.
+
+        Args:
+            pipeline (bool, optional): combine consecutive read and test commands (see Adapter.run). Defaults to False.
+        """
+        busy = [adapter for adapter in self.adapters if adapter._update(pipeline)]
+        while busy:
+            for event in self._poll.poll(min([adapter._poll_timeout() for adapter in busy])):
+                for adapter in self.adapters:
+                    if adapter._uart is event[0]:
+                        adapter._process_input(event[0])
+            busy = [adapter for adapter in busy if adapter._update(pipeline)]
@@ -0,0 +1,95 @@
+import io
+from Logging import Logger
+
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
+class BulkUploader:
+    def __init__(self, modem, url:str, path:str, shssl_params:str, max_body:int=4096, max_batch:int=100):
+        """Initializes the bulk uploader, which POSTs buffered reports in compressed batches via HTTPS
+
+        Body of a request (zlib compressed, if the firmware supports compression):
+            {"reports": [{"ts": <s since 1970>, "gnss": {...}, ...}, ...]}
+
+        Args:
+            modem (SIM7080g): modem used for the upload
+            url (str): server url including scheme and port (e.g. "https://<host>:8443")
+            path (str): request path (e.g. "/topics/<topic>?qos=1")
+            shssl_params (str): SSL parameters for HTTPS (see example config file)
+            max_body (int, optional): maximum body length in bytes accepted by the modem. Defaults to 4096.
+            max_batch (int, optional): maximum number of reports per request. Defaults to 100.
+        """
+        self.modem = modem
+        self.url = url
+        self.path = path
+        self.shssl_params = shssl_params
+        self.max_body = max_body
+        self.max_batch = max_batch
+        self.logger = Logger("BulkUploader")
+
+    def _encode(self, reports:list):
+        """Encodes and compresses a batch of reports
+
+        Args:
+            reports (list of str): JSON encoded reports
+
+        Returns:
+            tuple: (body, compressed)
+        """
+        body = ('{"reports": [' + ", ".join(reports) + ']}').encode()
+        if deflate is None:
+            return body, False
+        try:
+            buf = io.BytesIO()
+            with deflate.DeflateIO(buf, deflate.ZLIB, 10) as d:
+                d.write(body)
+            return buf.getvalue(), True
+        except OSError:
+            # firmware built without compression support
+            return body, False
+
+    def upload(self, reports:list):
+        """Uploads reports in as few requests as possible over one HTTPS connection
+
+        Args:
+            reports (list of str): JSON encoded reports ("reported" section including "ts"), oldest first
+
+        Returns:
+            int: number of reports uploaded or dropped as too large (from the start of the list)
+        """
+        self.modem.setup_http_context(self.url, self.shssl_params, self.max_body)
+        if not self.modem.http_connect():
+            self.logger.warning("Failed to connect to HTTPS server.")
+            return 0
+
+        uploaded = 0
+        n = self.max_batch
+        while uploaded < len(reports):
+            body, compressed = self._encode(reports[uploaded:uploaded+n])
+
+            # halve the batch until it fits into one request
+            if len(body) > self.max_body:
+                if n > 1:
+                    n = n // 2
+                    continue
+                # a single report that never fits would block the backlog
+                self.logger.warning(f"Dropping report of {len(body)} bytes, exceeds max_body.")
+                uploaded += 1
+                n = self.max_batch
+                continue
+
+            headers = {"Content-Type": "application/json"}
+            if compressed:
+                headers["Content-Encoding"] = "deflate"
+            status = self.modem.http_post(self.path, body, headers)
+            if status != 200:
+                self.logger.warning(f"Upload failed with status {status}.")
+                break
+            uploaded += len(reports[uploaded:uploaded+n])
+            self.logger.debug(f"Uploaded {uploaded}/{len(reports)} reports ({len(body)} bytes)")
+            n = self.max_batch
+
+        self.modem.http_disconnect()
+        return uploaded
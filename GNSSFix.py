@@ -0,0 +1,70 @@
+# fix tuples are shared by the polled (+CGNSINF) and the streamed (NMEA) GNSS mode, so
+# polling does not need to import the NMEA parser
+
+import utime
+
+# fields of a fix tuple
+FIX_UTC = 0     # "yyyyMMddhhmmss.sss", same format as +CGNSINF
+FIX_LAT = 1     # degrees, negative for south
+FIX_LON = 2     # degrees, negative for west
+FIX_ALT = 3     # m above mean sea level
+FIX_SPEED = 4   # km/h over ground
+FIX_COURSE = 5  # degrees over ground
+FIX_SATS = 6    # satellites used
+FIX_HDOP = 7
+FIX_MODE = 8    # 1: no fix, 2: 2D, 3: 3D
+
+FIX_KEYS = ["utc", "lat", "lon", "alt", "speed", "course", "sats", "hdop", "mode"]
+
+
+def to_float(s:str):
+    return float(s) if s else None
+
+def to_int(s:str):
+    return int(s) if s else None
+
+def fix_to_dict(fix:tuple):
+    """Converts a fix tuple to a dict for reporting
+
+    Args:
+        fix (tuple): fix (see FIX_* constants)
+
+    Returns:
+        dict: fix with the keys in FIX_KEYS, empty fields are omitted
+    """
+    return {k: v for k, v in zip(FIX_KEYS, fix) if v is not None}
+
+def fix_time(fix:tuple):
+    """Get the UTC time of a fix
+
+    Args:
+        fix (tuple): fix (see FIX_* constants)
+
+    Returns:
+        int: UTC time in seconds since epoch (see utime.time), fractional seconds are dropped
+    """
+    t = fix[FIX_UTC]    # "20240114170832.000"
+    return utime.mktime((int(t[0:4]), int(t[4:6]), int(t[6:8]), int(t[8:10]), int(t[10:12]), int(t[12:14]), 0, 0))
+
+def fix_from_cgnsinf(gnss_info):
+    """Converts +CGNSINF fields to a fix tuple
+
+    Args:
+        gnss_info (list): +CGNSINF fields (see SIM7080g.get_GNSS_position)
+
+    Returns:
+        tuple: fix (see FIX_* constants) or None if there is no fix
+    """
+    if (gnss_info == -1) or (len(gnss_info) < 16) or (gnss_info[1] != "1"):
+        return None
+    return (
+        gnss_info[2],
+        to_float(gnss_info[3]),
+        to_float(gnss_info[4]),
+        to_float(gnss_info[5]),
+        to_float(gnss_info[6]),
+        to_float(gnss_info[7]),
+        to_int(gnss_info[15]),
+        to_float(gnss_info[10]),
+        3 if gnss_info[8] == "1" else 2
+    )
@@ -1,14 +1,25 @@
 from Logging import Logger
 from SIM7080g import SIM7080g
-import utime
+import GNSSFix
 import json
+import utime
+
+# features that are not needed for every boot are imported where they are used
+
+# offset of utime.time() to the Unix epoch (MicroPython ports count from 1970 or from 2000)
+UNIX_EPOCH_OFFSET = 0 if utime.gmtime(0)[0] == 1970 else 946684800
 
 class GPSTrackerStateMachine:
-    def __init__(self):
+    def __init__(self, boot_stats:dict=None):
         """Initializes the state machine with a null state and a logger.
+
+        Args:
+            boot_stats (dict, optional): startup measurements of main.py, reported with the first update. Defaults to None.
         """
         self.current_state = None
         self.logger = Logger("GPSTrackerStateMachine")
+        self.boot_stats = boot_stats
+        self.boot_ticks = utime.ticks_ms() if boot_stats is None else boot_stats.pop("ticks")
     
     def boot(self):
         """Boot state logic
@@ -25,6 +36,12 @@ class GPSTrackerStateMachine:
             self.logger.info("Initializing Modem...")
             self.modem = SIM7080g(0, 9600, 1, 0, 14)
             if not self.modem.flg_uart_initialized: self.transition("error")
+
+            # the modem reboot waits several seconds, which is not part of the startup time
+            init_ms = utime.ticks_diff(utime.ticks_ms(), self.boot_ticks)
+            self.logger.info(f"Boot to modem initialization: {init_ms} ms")
+            if self.boot_stats is not None:
+                self.boot_stats["init_ms"] = init_ms
             self.modem.initialize(True)
 
             self.logger.info("Boot successful. Transitioning to Configuration.")
@@ -38,10 +55,15 @@ class GPSTrackerStateMachine:
 
         Actions:
         - Load configuration from config.json
+        - Enable network time updates (time service only)
         - Connect to LTE network
         - Setup PDP context
-        - Sync time
+        - Sync time (time service or NTP)
         - Setup AWS context
+        - Setup network info cache (if enabled)
+        - Start NMEA stream (GNSS mode "stream" only)
+        - Build geofence index (if zones are configured)
+        - Setup bulk uploader (if HTTPS upload is configured)
 
         Transitions:
         - Transition to Idle state if successful
@@ -56,6 +78,20 @@ class GPSTrackerStateMachine:
                 self.logger.error(f"failed to load config.json: {e}")
                 self.transition('error')
                 
+            # without the time service, it is only used once to set the RTC via NTP
+            from TimeService import TimeService
+            time_service = TimeService(
+                self.modem,
+                self.config["time"]["ntp_server"],
+                self.config["time"]["timezone_offset"],
+                self.config["time"].get("max_drift", 2),
+                self.config["time"].get("drift_ppm", 50)
+                )
+            self.time_service = None
+            if self.config["time"].get("time_service", True):
+                self.time_service = time_service
+                self.modem.enable_network_time()
+
             self.logger.info("Connecting Modem to LTE...")
             
             if self.modem.setup_LTE():
@@ -79,7 +115,7 @@ class GPSTrackerStateMachine:
                 self.transition("error")       
 
             self.logger.info("Sync time...")
-            if self.modem.sync_NTP_time(self.config["time"]["ntp_server"], self.config["time"]["timezone_offset"]):
+            if time_service.sync() if self.time_service is not None else time_service.sync_ntp():
                 self.logger.info("Successfully sync time.")
             else:
                 self.logger.error("Failed to sync time.")
@@ -91,6 +127,49 @@ class GPSTrackerStateMachine:
                 self.config["aws_config"]["smssl"]
                 )
 
+            self.network_info = None
+            network_info_config = self.config.get("network_info", {})
+            if network_info_config.get("enabled", True):
+                from NetworkInfo import NetworkInfo
+                self.network_info = NetworkInfo(
+                    self.modem,
+                    network_info_config.get("apn_ttl", 86400),
+                    network_info_config.get("service_domain_ttl", 86400)
+                    )
+
+            self.nmea_parser = None
+            if self.config["tracking"].get("gnss_mode", "poll") == "stream":
+                import NMEA
+                self.logger.info("Starting NMEA stream...")
+                self.nmea_parser = NMEA.NMEAParser(self.config["tracking"].get("nmea_buffer_size", 60))
+                self.modem.turn_on_GNSS()
+                if not self.modem.start_NMEA_stream(self.nmea_parser):
+                    self.logger.error("Failed to start NMEA stream.")
+                    self.transition("error")
+
+            self.geofence = None
+            self.zone = None
+            self.last_upload = None
+            geofence_config = self.config.get("geofence", {})
+            if geofence_config.get("zones"):
+                from Geofence import Geofence
+                self.geofence = Geofence(geofence_config["zones"], geofence_config.get("cell_size", 0.01),
+                    geofence_config.get("max_cells", 64))
+
+            self.backlog = []
+            self.bulk_uploader = None
+            http_config = self.config.get("http_config")
+            if http_config:
+                from BulkUploader import BulkUploader
+                self.bulk_uploader = BulkUploader(
+                    self.modem,
+                    http_config["url"],
+                    http_config["path"],
+                    http_config["shssl"],
+                    http_config.get("max_body", 4096),
+                    http_config.get("max_batch", 100)
+                    )
+
             self.logger.info("Configuration successful. Transitioning to Idle.")
             self.transition('idle')
         except Exception as e:
@@ -102,6 +181,7 @@ class GPSTrackerStateMachine:
 
         Actions:
         - Sleep for camping interval
+          (GNSS mode "stream": process NMEA sentences for moving interval instead)
         
         Transitions:
         - Transition to track state
@@ -109,7 +189,10 @@ class GPSTrackerStateMachine:
         """
         try:
             self.logger.debug(self.modem.at_adap._unsolicited_responses)
-            utime.sleep(self.config["tracking"]["camping_interval"])
+            if self.nmea_parser is not None:
+                self.modem.at_adap.listen(1000*self.config["tracking"]["moving_interval"])
+            else:
+                utime.sleep(self.config["tracking"]["camping_interval"])
             self.transition('track')
         except Exception as e:
             self.logger.error(f"Idle error: {e}")
@@ -120,37 +203,114 @@ class GPSTrackerStateMachine:
 
         Actions:
         - Turn on GNSS
-        - Get GNSS position
+        - Get GNSS position (GNSS mode "stream": latest fix from NMEA stream, if not older than moving interval)
         - Turn off GNSS
-        - Connect to AWS
-        - Get network info
-        - Send MQTT update
-        - Disconnect
+        - Sync time (time service only: GNSS time, NTP only if drift is too large)
+        - Check geofence, skip the following actions while inside a zone until the heartbeat is due
+          (unless the backlog is not empty)
+        - Get network info (cached, if enabled)
+        - Add report with GNSS fix, geofence event and changed network info fields to the backlog
+        - Upload backlog (see upload_backlog)
 
         Transitions:
         - Transition to idle state
         - Transition to error state if unsuccessful
         """
         try:
-            self.modem.turn_on_GNSS()
-            self.modem.get_GNSS_position()
-            self.modem.turn_off_GNSS()
-            self.modem.connect_to_AWS()
-            network_info = self.modem.get_network_info()
-            self.modem.send_mqtt(self.config["aws_config"]["mqtt_update_topic"], 
-                str({
-                    "state": {
-                        "reported": {
-                            "network_info": network_info
-                            }}}).replace("'", '"')
-            )
-            
-            self.modem.disconnect_from_AWS()
+            if self.nmea_parser is not None:
+                fix = self.nmea_parser.latest()
+                # the ring keeps the last fix after the signal is lost, its age does not depend on the
+                # RTC, so a fresh fix can correct a wrong RTC
+                if (fix is not None) and \
+                    (self.nmea_parser.latest_age_ms() > 1000*self.config["tracking"]["moving_interval"]):
+                    self.logger.info(f"Latest fix from {fix[GNSSFix.FIX_UTC]} is stale.")
+                    fix = None
+            else:
+                self.modem.turn_on_GNSS()
+                fix = GNSSFix.fix_from_cgnsinf(self.modem.get_GNSS_position())
+                self.modem.turn_off_GNSS()
+            if self.time_service is not None:
+                self.time_service.update_from_gnss(fix)
+                self.time_service.sync()
+
+            geofence_events = []
+            if (self.geofence is not None) and (fix is not None):
+                zone = self.geofence.locate(fix[GNSSFix.FIX_LAT], fix[GNSSFix.FIX_LON])
+                if zone != self.zone:
+                    # moving directly from one zone into another leaves the first one
+                    if self.zone is not None:
+                        geofence_events.append({"event": "exit", "zone": self.zone})
+                    if zone is not None:
+                        geofence_events.append({"event": "enter", "zone": zone})
+                    for event in geofence_events:
+                        self.logger.info(f"Geofence {event['event']}: {event['zone']}")
+                # a pending backlog (e.g. an undelivered enter event) is uploaded right away
+                elif (zone is not None) and (not self.backlog) and (self.last_upload is not None) and \
+                    (utime.time() - self.last_upload < self.config["geofence"].get("heartbeat_interval", 86400)):
+                    self.logger.info(f"Inside zone {zone}, skipping upload.")
+                    self.transition('idle')
+                    return
+
+            network_info_delta = {}
+            if self.network_info is not None:
+                network_info_delta = self.network_info.changes(self.network_info.get())
+            reported = {}
+            if fix is not None:
+                reported["gnss"] = GNSSFix.fix_to_dict(fix)
+            if geofence_events:
+                reported["geofence"] = geofence_events
+                self.zone = zone
+            if network_info_delta:
+                reported["network_info"] = network_info_delta
+            if self.boot_stats is not None:
+                reported["boot"] = self.boot_stats
+                self.boot_stats = None
+
+            # the report is delivered from the backlog, even if this upload fails
+            if network_info_delta:
+                self.network_info.acknowledge(network_info_delta)
+            # "ts" is the creation time, the shadow only knows the time of the update.
+            # Reports are kept encoded, a JSON string takes far less heap than the dicts.
+            reported["ts"] = utime.time() + UNIX_EPOCH_OFFSET
+            self.backlog.append(json.dumps(reported))
+            max_backlog = self.config["tracking"].get("max_backlog", 200)
+            if len(self.backlog) > max_backlog:
+                self.logger.warning(f"Backlog full, dropping {len(self.backlog) - max_backlog} reports.")
+                self.backlog = self.backlog[-max_backlog:]
+                # dropped reports may carry the only copy of changed fields, report everything again
+                if self.network_info is not None:
+                    self.network_info.invalidate()
+
+            if self.upload_backlog():
+                self.last_upload = utime.time()
             self.transition('idle')
         except Exception as e:
             self.logger.error(f"Track error: {e}")
             self.transition('error')
 
+    def upload_backlog(self):
+        """Uploads the backlog, oldest reports first. Large backlogs are uploaded in compressed
+        batches via HTTPS (if configured), small ones as one MQTT update per report.
+
+        Returns:
+            bool: True if the backlog was uploaded completely, False otherwise
+        """
+        if (self.bulk_uploader is not None) and \
+            (len(self.backlog) >= self.config["http_config"].get("bulk_threshold", 20)):
+            self.logger.info(f"Uploading {len(self.backlog)} reports via HTTPS...")
+            self.backlog = self.backlog[self.bulk_uploader.upload(self.backlog):]
+            return not self.backlog
+
+        if self.modem.connect_to_AWS():
+            while self.backlog:
+                if not self.modem.send_mqtt(self.config["aws_config"]["mqtt_update_topic"], 
+                    '{"state": {"reported": ' + self.backlog[0] + '}}'
+                ):
+                    break
+                self.backlog.pop(0)
+        self.modem.disconnect_from_AWS()
+        return not self.backlog
+
     def error(self):
         """Error state logic
         Actions:
@@ -0,0 +1,104 @@
+import math
+from Logging import Logger
+
+ZONE_TYPE_CIRCLE = "circle"
+ZONE_TYPE_POLYGON = "polygon"
+
+METERS_PER_DEGREE = 111320
+
+
+class Geofence:
+    def __init__(self, zones:list, cell_size:float=0.01, max_cells:int=64):
+        """Initializes the geofence and precomputes the grid index
+
+        Every zone is registered in all grid cells its bounding box overlaps, so a lookup
+        only tests the zones of a single cell. Zones overlapping more than max_cells cells
+        are not registered in the grid but tested on every lookup, which bounds the size
+        of the index.
+
+        Example:
+            [
+                {"name": "depot", "type": "circle", "lat": 52.52, "lon": 13.40, "radius": 200},
+                {"name": "yard", "type": "polygon", "points": [[52.50, 13.30], [52.50, 13.31], [52.51, 13.31]]}
+            ]
+
+        Args:
+            zones (list of dict): zones (see example, radius in m)
+            cell_size (float, optional): edge length of a grid cell in degrees. Defaults to 0.01.
+            max_cells (int, optional): maximum number of grid cells per zone. Defaults to 64.
+        """
+        self.logger = Logger("Geofence")
+        self.cell_size = cell_size
+        self._zones = []
+        self._grid = {}
+        self._large = []
+
+        for zone in zones:
+            if zone["type"] == ZONE_TYPE_CIRCLE:
+                dlat = zone["radius"] / METERS_PER_DEGREE
+                dlon = dlat / math.cos(math.radians(zone["lat"]))
+                bbox = (zone["lat"]-dlat, zone["lon"]-dlon, zone["lat"]+dlat, zone["lon"]+dlon)
+                shape = (zone["lat"], zone["lon"], zone["radius"]**2, math.cos(math.radians(zone["lat"])))
+            elif zone["type"] == ZONE_TYPE_POLYGON:
+                lats = [float(p[0]) for p in zone["points"]]
+                lons = [float(p[1]) for p in zone["points"]]
+                bbox = (min(lats), min(lons), max(lats), max(lons))
+                shape = (lats, lons)
+            else:
+                self.logger.warning(f"Unknown zone type: {zone['type']}")
+                continue
+
+            index = len(self._zones)
+            self._zones.append((zone["name"], zone["type"], bbox, shape))
+            rows = range(self._cell(bbox[0]), self._cell(bbox[2])+1)
+            cols = range(self._cell(bbox[1]), self._cell(bbox[3])+1)
+            if len(rows) * len(cols) > max_cells:
+                self._large.append(index)
+                continue
+            for i in rows:
+                for j in cols:
+                    self._grid.setdefault((i, j), []).append(index)
+
+        self.logger.debug(f"{len(self._zones)} zones in {len(self._grid)} grid cells, {len(self._large)} large zones")
+
+    def _cell(self, value:float):
+        return math.floor(value / self.cell_size)
+
+    def locate(self, lat:float, lon:float):
+        """Get the zone a position is in
+
+        Args:
+            lat (float): latitude in degrees
+            lon (float): longitude in degrees
+
+        Returns:
+            str: name of the first matching zone or None if outside all zones
+        """
+        candidates = self._grid.get((self._cell(lat), self._cell(lon)), ())
+        if self._large:
+            # keep the configured order, so the first matching zone wins
+            candidates = sorted(list(candidates) + self._large)
+        for index in candidates:
+            name, typ, bbox, shape = self._zones[index]
+            if (lat < bbox[0]) or (lon < bbox[1]) or (lat > bbox[2]) or (lon > bbox[3]):
+                continue
+            if typ == ZONE_TYPE_CIRCLE:
+                dy = (lat - shape[0]) * METERS_PER_DEGREE
+                dx = (lon - shape[1]) * METERS_PER_DEGREE * shape[3]
+                if dx*dx + dy*dy <= shape[2]:
+                    return name
+            elif self._in_polygon(lat, lon, shape[0], shape[1]):
+                return name
+        return None
+
+    def _in_polygon(self, lat:float, lon:float, lats:list, lons:list):
+        """Ray casting point-in-polygon test
+        """
+        inside = False
+        j = len(lats) - 1
+        for i in range(len(lats)):
+            if ((lats[i] > lat) != (lats[j] > lat)) and \
+                (lon < (lons[j]-lons[i]) * (lat-lats[i]) / (lats[j]-lats[i]) + lons[i]):
+                inside = not inside
+            j = i
+        return inside
@@ -0,0 +1,161 @@
+import utime
+from Logging import Logger
+from GNSSFix import FIX_KEYS, FIX_UTC, FIX_LAT, FIX_LON, FIX_ALT, FIX_SPEED, FIX_COURSE, FIX_SATS, FIX_HDOP, FIX_MODE, to_float, to_int
+
+
+def _coordinate(value:str, hemisphere:str):
+    """Converts a NMEA coordinate ("dddmm.mmmm", "N"/"S"/"E"/"W") to degrees
+    """
+    if not value:
+        return None
+    dot = value.find(".")
+    if dot < 0:
+        dot = len(value)
+    deg = int(value[:dot-2]) + float(value[dot-2:]) / 60
+    return -deg if hemisphere in ("S", "W") else deg
+
+
+class NMEAParser:
+    def __init__(self, size:int=60):
+        """Initializes the NMEA parser
+
+        Sentences are fed line by line (see feed). GGA, RMC and GSA sentences of the same
+        second are merged into one fix, which is stored in a ring of the last `size` fixes
+        once the next second starts. Fixes are therefore yielded at 1 Hz at most.
+
+        Args:
+            size (int, optional): number of fixes kept in the ring. Defaults to 60.
+        """
+        self.logger = Logger("NMEAParser")
+        self._ring = [None] * size
+        self._head = 0
+        self._count = 0
+        self._latest_ticks = 0
+        self._date = ""
+        self._second = ""
+        self._epoch = [None] * len(FIX_KEYS)
+        self.errors = 0
+
+    def feed(self, line:str):
+        """Parses one NMEA sentence
+
+        Args:
+            line (str): NMEA sentence including "$" and checksum (e.g. "$GNRMC,...*6A")
+
+        Returns:
+            bool: True if the sentence was valid, False otherwise
+        """
+        star = line.rfind("*")
+        if (star < 7) or (line[0] != "$"):
+            self.errors += 1
+            return False
+
+        checksum = 0
+        for c in line[1:star]:
+            checksum ^= ord(c)
+        try:
+            if checksum != int(line[star+1:star+3], 16):
+                self.errors += 1
+                return False
+        except ValueError:
+            self.errors += 1
+            return False
+
+        typ = line[3:6]
+        if typ not in ("GGA", "RMC", "GSA"):
+            return True
+
+        f = line[1:star].split(",")
+        try:
+            if typ == "GSA":
+                # GSA carries no time, it belongs to the current epoch
+                if (len(f) > 2) and (self._epoch[FIX_MODE] is None):
+                    self._epoch[FIX_MODE] = to_int(f[2])
+                return True
+
+            self._start_epoch(f[1])
+
+            e = self._epoch
+            if (typ == "GGA") and (len(f) > 9):
+                if f[6] not in ("", "0"):
+                    e[FIX_LAT] = _coordinate(f[2], f[3])
+                    e[FIX_LON] = _coordinate(f[4], f[5])
+                e[FIX_SATS] = to_int(f[7])
+                e[FIX_HDOP] = to_float(f[8])
+                e[FIX_ALT] = to_float(f[9])
+
+            elif (typ == "RMC") and (len(f) > 9):
+                if f[9]:
+                    self._date = "20" + f[9][4:6] + f[9][2:4] + f[9][0:2]  # ddmmyy --> yyyymmdd
+                if f[2] == "A":
+                    e[FIX_LAT] = _coordinate(f[3], f[4])
+                    e[FIX_LON] = _coordinate(f[5], f[6])
+                    e[FIX_SPEED] = to_float(f[7]) * 1.852 if f[7] else None
+                    e[FIX_COURSE] = to_float(f[8])
+        except ValueError:
+            self.errors += 1
+            return False
+
+        return True
+
+    def _start_epoch(self, time:str):
+        """Commits the current epoch, if time belongs to a new second
+
+        Args:
+            time (str): UTC time of the sentence ("hhmmss.sss")
+        """
+        second = time[:6]
+        if second == self._second:
+            return
+
+        e = self._epoch
+        if (e[FIX_LAT] is not None) and self._date:
+            e[FIX_UTC] = self._date + self._second + ".000"
+            self._ring[self._head] = tuple(e)
+            self._head = (self._head + 1) % len(self._ring)
+            self._count = min(self._count + 1, len(self._ring))
+            self._latest_ticks = utime.ticks_ms()
+
+        for i in range(len(e)):
+            e[i] = None
+        self._second = second
+
+    def latest(self):
+        """Get the most recent fix. The fix is kept after the signal is lost, so callers
+        check its age (see latest_age_ms).
+
+        Returns:
+            tuple: fix (see FIX_* constants) or None if there is none
+        """
+        if self._count == 0:
+            return None
+        return self._ring[self._head - 1]
+
+    def latest_age_ms(self):
+        """Get the time since the most recent fix was stored, measured without the RTC
+
+        Returns:
+            int: age in ms or -1 if there is no fix
+        """
+        if self._count == 0:
+            return -1
+        return utime.ticks_diff(utime.ticks_ms(), self._latest_ticks)
+
+    def samples(self, n:int=None):
+        """Get the most recent fixes
+
+        Args:
+            n (int, optional): maximum number of fixes. Defaults to all fixes in the ring.
+
+        Returns:
+            list of tuple: fixes, oldest first
+        """
+        n = self._count if (n is None) or (n > self._count) else n
+        size = len(self._ring)
+        return [self._ring[(self._head - n + i) % size] for i in range(n)]
+
+    def clear(self):
+        """Removes all fixes from the ring
+        """
+        self._head = 0
+        self._count = 0
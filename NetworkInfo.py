@@ -0,0 +1,280 @@
+import utime
+from Logging import Logger
+import ATadapter
+
+LOCATION_FIELDS = ("Basestation Longitude", "Basestation Latitude", "Basestation Accuracy")
+
+class NetworkInfo:
+    def __init__(self, modem, apn_ttl:int=86400, service_domain_ttl:int=86400):
+        """Initializes the cached network info provider
+
+        The serving cell (+CPSI) is queried on every call, as it carries the signal quality.
+        APN (+CGNAPN) and service domain (+CSDP) are only queried again after their TTL has expired.
+        The base station location (+CLBS) is only queried again when the serving cell ID changes.
+
+        Args:
+            modem (SIM7080g): modem used to query the network information
+            apn_ttl (int, optional): time in s until the APN is queried again. Defaults to 86400.
+            service_domain_ttl (int, optional): time in s until the service domain is queried again. Defaults to 86400.
+        """
+        self.modem = modem
+        self.logger = Logger("NetworkInfo")
+        self._ttl = {"APN": apn_ttl, "Service Domain Preference": service_domain_ttl}
+        self._cache = {}
+        self._fetched = {}
+        self._cell_id = None
+        self._reported = {}
+        self._expired = {}
+        self._pending = None
+
+    def get(self):
+        """Get network information, using cached values where possible
+
+        Returns:
+            dict: network information (see query_network_info)
+        """
+        self.queue()
+        self.modem.at_adap.run(pipeline=True)
+        return self.parse()
+
+    def queue(self):
+        """Queues the commands for the serving cell and the expired fields (in one command line, if
+        the adapter runs with pipeline=True), without running them. Run the modem's adapter or an
+        ATadapter.Scheduler, then call parse.
+        The base station location is queued as well as long as it is unknown (e.g. on the first call).
+        """
+        now = utime.time()
+        self._expired = {field: (field not in self._cache) or (now - self._fetched[field] >= ttl) for field, ttl in self._ttl.items()}
+        self._pending = queue_network_info(self.modem, self._expired["Service Domain Preference"], self._expired["APN"],
+            self._cell_id is None)
+
+    def parse(self):
+        """Parses the commands queued by queue, using cached values where possible.
+        If the serving cell changed since the base station location was queued, the location
+        is queried (and run) on the spot.
+
+        Returns:
+            dict: network information (see query_network_info)
+        """
+        now = utime.time()
+        network_info = parse_network_info(self._pending)
+        queued_location = {k: network_info.pop(k) for k in LOCATION_FIELDS if k in network_info}
+
+        for field in self._ttl:
+            if self._expired[field] and (network_info.get(field, "") != ""):
+                self._cache[field] = network_info[field]
+                self._fetched[field] = now
+            network_info[field] = self._cache.get(field, "")
+
+        # base station location only changes with the serving cell
+        cell_id = network_info.get("SCellID", network_info.get("Cell ID"))
+        if (cell_id is not None) and (cell_id != self._cell_id):
+            location = queued_location if self._pending[3] is not None else query_basestation_location(self.modem)
+            if location:
+                self._cache["location"] = location
+                self._cell_id = cell_id
+            else:
+                self._cache.pop("location", None)
+        network_info.update(self._cache.get("location", {}))
+
+        return network_info
+
+    def changes(self, network_info:dict):
+        """Get all fields that changed since the last acknowledged report
+
+        Args:
+            network_info (dict): current network information (see get)
+
+        Returns:
+            dict: changed fields and their new values
+        """
+        return {k: v for k, v in network_info.items() if (k not in self._reported) or (self._reported[k] != v)}
+
+    def acknowledge(self, delta:dict):
+        """Mark fields as reported, after the report was accepted
+
+        Args:
+            delta (dict): fields that were reported (see changes)
+        """
+        self._reported.update(delta)
+
+    def invalidate(self):
+        """Drop all cached values and the acknowledged state, so that the next report is complete
+        """
+        self._cache = {}
+        self._fetched = {}
+        self._cell_id = None
+        self._reported = {}
+        self.logger.debug("Cache invalidated")
+
+
+def query_network_info(modem, service_domain: bool=True, apn: bool=True, basestation: bool=True):
+    """Get network information. The read commands are sent in one command line.
+
+    Example:
+        {
+            "System Mode": "LTE",
+            "Operation Mode": "Online",
+            "MCC-MNC": "28602",
+            "TAC": "0001",
+            "SCellID": 0,
+            "eNBID": 0,
+            "SectorID": 0,
+            "PCellID": 0,
+            "Frequency Band": "B3",
+            "earfcn": 1400,
+            "dlbw": 15,
+            "ulbw": 15,
+            "RSRQ": -10,
+            "RSRP": -80,
+            "RSSI": -60,
+            "RSSNR": 10,
+            "Service Domain Preference": "PS Only",
+            "APN": "tm",
+            "Basestation Longitude": "x.xxxxxx",
+            "Basestation Latitude": "y.yyyyyy",
+            "Basestation Accuracy": "z.zzzz"
+        }
+
+    Args:
+        modem (SIM7080g): modem used to query the network information
+        service_domain (bool, optional): include "Service Domain Preference". Defaults to True.
+        apn (bool, optional): include "APN". Defaults to True.
+        basestation (bool, optional): include base station location (separate network request). Defaults to True.
+
+    Returns:
+        dict: network information
+    """
+    cmds = queue_network_info(modem, service_domain, apn, basestation)
+    modem.at_adap.run(pipeline=True)
+    return parse_network_info(cmds)
+
+
+def queue_network_info(modem, service_domain: bool=True, apn: bool=True, basestation: bool=True):
+    """Queues the commands for the network information without running them (see query_network_info),
+    so they can be run on several modems at once by an ATadapter.Scheduler
+
+    Args:
+        modem (SIM7080g): modem used to query the network information
+        service_domain (bool, optional): include "Service Domain Preference". Defaults to True.
+        apn (bool, optional): include "APN". Defaults to True.
+        basestation (bool, optional): include base station location (separate network request). Defaults to True.
+
+    Returns:
+        list: queued commands (+CPSI, +CSDP, +CGNAPN, +CLBS), None for the ones not included (see parse_network_info)
+    """
+    at_cpsi = ATadapter.AT_command("+CPSI", ATadapter.AT_CMD_TYPE_READ)
+    at_csdp = ATadapter.AT_command("+CSDP", ATadapter.AT_CMD_TYPE_READ) if service_domain else None
+    at_cgnapn = ATadapter.AT_command("+CGNAPN", ATadapter.AT_CMD_TYPE_READ) if apn else None
+    at_clbs = _basestation_command() if basestation else None
+    for cmd in (at_cpsi, at_csdp, at_cgnapn, at_clbs):
+        if cmd is not None:
+            modem.at_adap.queue_command(cmd)
+    return [at_cpsi, at_csdp, at_cgnapn, at_clbs]
+
+
+def parse_network_info(cmds:list):
+    """Parses the commands queued by queue_network_info, after they have run
+
+    Args:
+        cmds (list): commands (see queue_network_info)
+
+    Returns:
+        dict: network information (see query_network_info)
+    """
+    at_cpsi, at_csdp, at_cgnapn, at_clbs = cmds
+    network_info = _parse_serving_cell(at_cpsi)
+    if at_csdp is not None: network_info["Service Domain Preference"] = _parse_service_domain(at_csdp)
+    if at_cgnapn is not None: network_info["APN"] = _parse_apn(at_cgnapn)
+    if at_clbs is not None: network_info.update(_parse_basestation_location(at_clbs))
+    return network_info
+
+
+def _parse_serving_cell(at_cpsi):
+    """Parses the response of a finished +CPSI read command
+    """
+    network_info = {}
+
+    if at_cpsi.state == ATadapter.AT_CMD_STATE_FINISHED:
+        entries = at_cpsi.res1[0].split(",")
+        network_info["System Mode"] = entries[0]
+        network_info["Operation Mode"] = entries[1]
+
+        if len(entries) > 2:
+            network_info["MCC-MNC"] = entries[2]
+
+        if len(entries) == 9: # GSM
+            network_info["LAC"] = entries[3]
+            network_info["Cell ID"] = entries[4]
+            network_info["Absolute RF Ch Num"] = entries[5]
+            network_info["RxLev"] = entries[6]
+            network_info["Track LO Adjust"] = entries[7]
+            network_info["C1-C2"] = entries[8]
+
+        if len(entries) == 14: # LTE
+            network_info["TAC"] = entries[3]
+            network_info["SCellID"] = int(entries[4])
+            network_info["eNBID"] = network_info["SCellID"] >> 8
+            network_info["SectorID"] = network_info["SCellID"] & 0xFF
+            network_info["PCellID"] = int(entries[5]) 
+            network_info["Frequency Band"] = entries[6]
+            network_info["earfcn"] = int(entries[7])
+            network_info["dlbw"] = int(entries[8])
+            network_info["ulbw"] = int(entries[9])
+            network_info["RSRQ"] = int(entries[10])
+            network_info["RSRP"] = int(entries[11])
+            network_info["RSSI"] = int(entries[12])
+            network_info["RSSNR"] = int(entries[13])
+
+    return network_info
+
+
+def _parse_service_domain(at_csdp):
+    """Parses the response of a finished +CSDP read command
+    """
+    d = {"0":"CS Only", "2":"PS Only", "3": "CS+PS"}
+    return "" if at_csdp.state != ATadapter.AT_CMD_STATE_FINISHED else d[at_csdp.res1[0]]
+
+
+def _parse_apn(at_cgnapn):
+    """Parses the response of a finished +CGNAPN read command
+    """
+    if (at_cgnapn.state != ATadapter.AT_CMD_STATE_FINISHED) or (not at_cgnapn.res1) or ("," not in at_cgnapn.res1[0]):
+        return ""
+    return at_cgnapn.res1[0].split(",")[1].strip('"')     # 1,"iot" --> iot
+
+
+def query_basestation_location(modem):
+    """Get location of the serving base station via AT CLBS command
+    (requires an active PDP context, as the modem queries a location service)
+
+    Args:
+        modem (SIM7080g): modem used to query the location
+
+    Returns:
+        dict: "Basestation Longitude", "Basestation Latitude", "Basestation Accuracy", empty if failed
+    """
+    at_clbs = _basestation_command()
+    modem.at_adap.queue_command(at_clbs)
+    modem.at_adap.run()
+
+    return _parse_basestation_location(at_clbs)
+
+
+def _basestation_command():
+    return ATadapter.AT_command("+CLBS", ATadapter.AT_CMD_TYPE_WRITE, "1,0", _afterrun=1000)
+
+
+def _parse_basestation_location(at_clbs):
+    """Parses the response of a finished +CLBS write command
+    """
+    network_info = {}
+
+    if at_clbs.state == ATadapter.AT_CMD_STATE_FINISHED:
+        d = at_clbs.res1[0].split(",")
+        if d[0] == "0":
+            network_info["Basestation Longitude"] = d[1]
+            network_info["Basestation Latitude"] = d[2]
+            network_info["Basestation Accuracy"] = d[3]
+
+    return network_info
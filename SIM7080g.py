@@ -191,8 +191,21 @@ class SIM7080g:
         else:
             return -1
         
+    def enable_network_time(self):
+        """Enable network time updates via AT CLTS command. The modem then reports the
+        network time with *PSUTTZ, +CTZV and DST unsolicited responses on registration.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        cmd = ATadapter.AT_command("+CLTS", ATadapter.AT_CMD_TYPE_WRITE, "1")
+        self.at_adap.queue_command(cmd)
+        self.at_adap.run()
+
+        return cmd.state == ATadapter.AT_CMD_STATE_FINISHED
+
     def sync_NTP_time(self, ntp_server: str, tz_offset: int):
-        """Sync time with NTP server
+        """Sync the modem clock with NTP server
 
         Args:
             ntp_server (str): NTP server url
@@ -204,36 +217,42 @@ class SIM7080g:
 
         # Set NTP server and timezone offset
         cmd1 = ATadapter.AT_command("+CNTP", ATadapter.AT_CMD_TYPE_WRITE, ntp_server + "," + str(4*tz_offset))
-        # Sync time
+        # Sync time, result code is reported after OK
         cmd2 = ATadapter.AT_command("+CNTP", ATadapter.AT_CMD_TYPE_EXEC, _afterrun=3000)
-        # Get current time
-        cclk = ATadapter.AT_command("+CCLK", ATadapter.AT_CMD_TYPE_READ)
         self.at_adap.queue_command(cmd1)
         self.at_adap.queue_command(cmd2)
-        self.at_adap.queue_command(cclk)
         self.at_adap.run()
 
-        self.logger.debug(cmd1)
-        self.logger.debug(cmd2)
-        self.logger.debug(cclk)
-
         # Check if time sync was successful
-        cntp_res_code = cmd2.res1[0].split(",")
-        if cntp_res_code == "61": self.logger.warning("Time sync failed: Network Error")
+        cntp_res_code = cmd2.res1[0].split(",")[0] if cmd2.res1 else ""
+        if cntp_res_code == "1": return True
+        elif cntp_res_code == "61": self.logger.warning("Time sync failed: Network Error")
         elif cntp_res_code == "62": self.logger.warning("Time sync failed: DNS resolution error")
         elif cntp_res_code == "63": self.logger.warning("Time sync failed: Connection Error")
         elif cntp_res_code == "64": self.logger.warning("Time sync failed: Service response error")
         elif cntp_res_code == "65": self.logger.warning("Time sync failed: Service Response Timeout")
-        else:
-            t, tz = cclk.res1[0][1:-1].split("+")  # "24/01/14,18:08:32+02" --> ["24/01/14,18:08:32", "02"]
-            d, t = t.split(",") # "24/01/14,18:08:32" --> ["24/01/14", "18:08:32"]
-            y, mo, d = d.split("/")
-            h, mi, s = t.split(":")
-            machine.RTC().datetime((int(y)+2000, int(mo), int(d), 0, int(h), int(mi), int(s), 0))
-        
-            return cmd2.state == 3
-        self.logger.warning("Failed to set Time")
+        else: self.logger.warning("Time sync failed: No result code")
         return False
+
+    def get_clock(self):
+        """Get the modem clock via AT CCLK command
+
+        Returns:
+            int: UTC time in seconds since epoch (see utime.time) or -1 if failed
+        """
+        cclk = ATadapter.AT_command("+CCLK", ATadapter.AT_CMD_TYPE_READ)
+        self.at_adap.queue_command(cclk)
+        self.at_adap.run()
+
+        if cclk.state != ATadapter.AT_CMD_STATE_FINISHED:
+            return -1
+
+        t = cclk.res1[0].strip('"')     # "24/01/14,18:08:32+08" --> 24/01/14,18:08:32+08
+        dt, tz = t[:-3], int(t[-3:])    # --> ["24/01/14,18:08:32", 8] (quarter hours)
+        d, t = dt.split(",")            # "24/01/14,18:08:32" --> ["24/01/14", "18:08:32"]
+        y, mo, d = d.split("/")
+        h, mi, s = t.split(":")
+        return utime.mktime((int(y)+2000, int(mo), int(d), int(h), int(mi), int(s), 0, 0)) - tz*900
     
     def setup_aws_context(self, smconf_params: list, csslcfg_params: list, smssl_params: list):
         """Setup AWS context
@@ -261,105 +280,116 @@ class SIM7080g:
 
     def connect_to_AWS(self):
         """Connect to AWS IoT Core via MQTT
+
+        Returns:
+            bool: True if successful, False otherwise
         """
-        smconn = ATadapter.AT_command("+SMCONN", ATadapter.AT_CMD_TYPE_EXEC, _timeout=20000)
+        smconn = self.queue_connect_to_AWS()
+        self.at_adap.run()
+
+        return smconn.state == ATadapter.AT_CMD_STATE_FINISHED
+
+    def queue_connect_to_AWS(self):
+        """Queue the MQTT connection to AWS IoT Core without running it (see connect_to_AWS),
+        e.g. to connect several modems at once with an ATadapter.Scheduler
 
+        Returns:
+            AT_command: +SMCONN command, AT_CMD_STATE_FINISHED once connected
+        """
+        smconn = ATadapter.AT_command("+SMCONN", ATadapter.AT_CMD_TYPE_EXEC, _timeout=20000)
         self.at_adap.queue_command(smconn)
-        self.at_adap.run()
+        return smconn
 
     def disconnect_from_AWS(self):
         """Disconnect from AWS IoT Core
         """
-        smdisc = ATadapter.AT_command("+SMDISC", ATadapter.AT_CMD_TYPE_EXEC)
+        self.queue_disconnect_from_AWS()
+        self.at_adap.run()
 
+    def queue_disconnect_from_AWS(self):
+        """Queue the disconnect from AWS IoT Core without running it (see disconnect_from_AWS)
+
+        Returns:
+            AT_command: +SMDISC command
+        """
+        smdisc = ATadapter.AT_command("+SMDISC", ATadapter.AT_CMD_TYPE_EXEC)
         self.at_adap.queue_command(smdisc)
+        return smdisc
+
+    def setup_http_context(self, url: str, shssl_params: str, body_len: int=4096, header_len: int=350):
+        """Setup HTTP(S) context
+
+        Args:
+            url (str): server url including scheme and port (e.g. "https://<host>:8443")
+            shssl_params (str): SSL parameters for HTTPS (see example config file)
+            body_len (int, optional): maximum body length in bytes. Defaults to 4096.
+            header_len (int, optional): maximum header length in bytes. Defaults to 350.
+        """
+        self.at_adap.queue_command(ATadapter.AT_command("+SHCONF", ATadapter.AT_CMD_TYPE_WRITE, f'"URL","{url}"'))
+        self.at_adap.queue_command(ATadapter.AT_command("+SHCONF", ATadapter.AT_CMD_TYPE_WRITE, f'"BODYLEN",{body_len}'))
+        self.at_adap.queue_command(ATadapter.AT_command("+SHCONF", ATadapter.AT_CMD_TYPE_WRITE, f'"HEADERLEN",{header_len}'))
+        self.at_adap.queue_command(ATadapter.AT_command("+SHSSL", ATadapter.AT_CMD_TYPE_WRITE, shssl_params))
         self.at_adap.run()
 
-    def get_network_info(self):
-        """Get network information
-        Example:
-            {
-                "System Mode": "LTE",
-                "Operation Mode": "Online",
-                "MCC-MNC": "28602",
-                "TAC": "0001",
-                "SCellID": 0,
-                "eNBID": 0,
-                "SectorID": 0,
-                "PCellID": 0,
-                "Frequency Band": "B3",
-                "earfcn": 1400,
-                "dlbw": 15,
-                "ulbw": 15,
-                "RSRQ": -10,
-                "RSRP": -80,
-                "RSSI": -60,
-                "RSSNR": 10,
-                "Service Domain Preference": "PS Only",
-                "APN": "tm",
-                "Basestation Longitude": "x.xxxxxx",
-                "Basestation Latitude": "y.yyyyyy",
-                "Basestation Accuracy": "z.zzzz"
-            }
+    def http_connect(self):
+        """Connect to the HTTP(S) server, the connection is reused by all following requests
 
         Returns:
-            dict: network information
+            bool: True if successful, False otherwise
         """
-        at_cpsi = ATadapter.AT_command("+CPSI", ATadapter.AT_CMD_TYPE_READ)
-        at_csdp = ATadapter.AT_command("+CSDP", ATadapter.AT_CMD_TYPE_READ)
-        at_cgnapn = ATadapter.AT_command("+CGNAPN", ATadapter.AT_CMD_TYPE_READ)
-        at_clbs = ATadapter.AT_command("+CLBS", ATadapter.AT_CMD_TYPE_WRITE, "1,0", _afterrun=1000)
-        self.at_adap.queue_command(at_cpsi)
-        self.at_adap.queue_command(at_csdp)
-        self.at_adap.queue_command(at_cgnapn)
-        self.at_adap.queue_command(at_clbs)
+        shconn = ATadapter.AT_command("+SHCONN", ATadapter.AT_CMD_TYPE_EXEC, _timeout=20000)
+
+        self.at_adap.queue_command(shconn)
         self.at_adap.run()
 
-        network_info = {}
-
-        if at_cpsi.state == ATadapter.AT_CMD_STATE_FINISHED:
-            entries = at_cpsi.res1[0].split(",")
-            network_info["System Mode"] = entries[0]
-            network_info["Operation Mode"] = entries[1]
-
-            if len(entries) > 2:
-                network_info["MCC-MNC"] = entries[2]
-
-            if len(entries) == 9: # GSM
-                network_info["LAC"] = entries[3]
-                network_info["Cell ID"] = entries[4]
-                network_info["Absolute RF Ch Num"] = entries[5]
-                network_info["RxLev"] = entries[6]
-                network_info["Track LO Adjust"] = entries[7]
-                network_info["C1-C2"] = entries[8]
-
-            if len(entries) == 14: # LTE
-                network_info["TAC"] = entries[3]
-                network_info["SCellID"] = int(entries[4])
-                network_info["eNBID"] = network_info["SCellID"] >> 8
-                network_info["SectorID"] = network_info["SCellID"] & 0xFF
-                network_info["PCellID"] = int(entries[5]) 
-                network_info["Frequency Band"] = entries[6]
-                network_info["earfcn"] = int(entries[7])
-                network_info["dlbw"] = int(entries[8])
-                network_info["ulbw"] = int(entries[9])
-                network_info["RSRQ"] = int(entries[10])
-                network_info["RSRP"] = int(entries[11])
-                network_info["RSSI"] = int(entries[12])
-                network_info["RSSNR"] = int(entries[13])
-
-        d = {"0":"CS Only", "2":"PS Only", "3": "CS+PS"}
-        network_info["Service Domain Preference"] = "" if at_csdp.state != ATadapter.AT_CMD_STATE_FINISHED else d[at_csdp.res1[0]]
-        network_info["APN"] = "" if at_cgnapn.state != ATadapter.AT_CMD_STATE_FINISHED else at_cgnapn.res1
-
-        if at_clbs.state == ATadapter.AT_CMD_STATE_FINISHED:
-            d = at_clbs.res1[0].split(",")
-            if d[0] == "0":
-                network_info["Basestation Longitude"] = d[1]
-                network_info["Basestation Latitude"] = d[2]
-                network_info["Basestation Accuracy"] = d[3]
-
-        return network_info
+        return shconn.state == ATadapter.AT_CMD_STATE_FINISHED
+
+    def http_disconnect(self):
+        """Disconnect from the HTTP(S) server
+        """
+        shdisc = ATadapter.AT_command("+SHDISC", ATadapter.AT_CMD_TYPE_EXEC)
+
+        self.at_adap.queue_command(shdisc)
+        self.at_adap.run()
+
+    def http_post(self, path: str, body, headers: dict):
+        """Send a POST request over the open HTTP(S) connection
+
+        Args:
+            path (str): request path (e.g. "/topics/<topic>?qos=1")
+            body (bytes): request body
+            headers (dict): request headers
+
+        Returns:
+            int: HTTP status code or -1 if failed
+        """
+        self.at_adap.queue_command(ATadapter.AT_command("+SHCHEAD", ATadapter.AT_CMD_TYPE_EXEC))
+        for k, v in headers.items():
+            self.at_adap.queue_command(ATadapter.AT_command("+SHAHEAD", ATadapter.AT_CMD_TYPE_WRITE, f'"{k}","{v}"'))
+        at_shbod = ATadapter.AT_command("+SHBOD", ATadapter.AT_CMD_TYPE_WRITE, f"{len(body)},10000", _timeout=15000, data=body)
+        # the status is reported after OK
+        at_shreq = ATadapter.AT_command("+SHREQ", ATadapter.AT_CMD_TYPE_WRITE, f'"{path}",3', _timeout=5000, _afterrun=5000)
+        self.at_adap.queue_command(at_shbod)
+        self.at_adap.queue_command(at_shreq)
+        self.at_adap.run()
+
+        if (at_shbod.state != ATadapter.AT_CMD_STATE_FINISHED) or (not at_shreq.res1):
+            return -1
+        return int(at_shreq.res1[-1].split(",")[1])     # "POST",200,0 --> 200
+
+    def get_network_info(self, service_domain: bool=True, apn: bool=True, basestation: bool=True):
+        """Get network information (see NetworkInfo.query_network_info)
+
+        Args:
+            service_domain (bool, optional): include "Service Domain Preference". Defaults to True.
+            apn (bool, optional): include "APN". Defaults to True.
+            basestation (bool, optional): include base station location (separate network request). Defaults to True.
+
+        Returns:
+            dict: network information
+        """
+        from NetworkInfo import query_network_info
+        return query_network_info(self, service_domain, apn, basestation)
     
     def send_mqtt(self, topic:str, content:str, qos:int=0, retain:int=0):
         """Send MQTT message to AWS IoT Core
@@ -369,10 +399,31 @@ class SIM7080g:
             content (str): payload (json string)
             qos (int, optional): Quality of Service, 0, 1 or 2. 0: at most once, 1: at least once, 2: exactly once. Defaults to 0.
             retain (int, optional): Retain flag, 0 or 1. 0: message is not retained, 1: message is retained. Defaults to 0.
+
+        Returns:
+            bool: True if the modem accepted the message, False otherwise
+        """
+        at_smpub = self.queue_mqtt(topic, content, qos, retain)
+        self.at_adap.run()
+
+        return at_smpub.state == ATadapter.AT_CMD_STATE_FINISHED
+
+    def queue_mqtt(self, topic:str, content:str, qos:int=0, retain:int=0):
+        """Queue an MQTT message without running it (see send_mqtt), e.g. to publish
+        on several modems at once with an ATadapter.Scheduler
+
+        Args:
+            topic (str): topic
+            content (str): payload (json string)
+            qos (int, optional): Quality of Service (see send_mqtt). Defaults to 0.
+            retain (int, optional): Retain flag (see send_mqtt). Defaults to 0.
+
+        Returns:
+            AT_command: +SMPUB command, AT_CMD_STATE_FINISHED once the modem accepted the message
         """
         at_smpub = ATadapter.AT_command(f"+SMPUB", ATadapter.AT_CMD_TYPE_WRITE, f'"{topic}",{len(content)},{qos},{retain}', data=content)
         self.at_adap.queue_command(at_smpub)
-        self.at_adap.run()
+        return at_smpub
 
     def turn_on_GNSS(self):
         """Turn on GNSS module
@@ -388,6 +439,30 @@ class SIM7080g:
         self.at_adap.queue_command(cmd)
         self.at_adap.run()
 
+    def start_NMEA_stream(self, parser):
+        """Start streaming NMEA sentences from the GNSS module to the UART (GNSS must be turned on)
+
+        Args:
+            parser (NMEA.NMEAParser): parser the received sentences are fed into
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        self.at_adap.nmea_parser = parser
+        cmd = ATadapter.AT_command(f"+CGNSTST", ATadapter.AT_CMD_TYPE_WRITE, "1")
+        self.at_adap.queue_command(cmd)
+        self.at_adap.run()
+
+        return cmd.state == ATadapter.AT_CMD_STATE_FINISHED
+
+    def stop_NMEA_stream(self):
+        """Stop streaming NMEA sentences
+        """
+        cmd = ATadapter.AT_command(f"+CGNSTST", ATadapter.AT_CMD_TYPE_WRITE, "0")
+        self.at_adap.queue_command(cmd)
+        self.at_adap.run()
+        self.at_adap.nmea_parser = None
+
     def get_GNSS_position(self):
         """Get GNSS position
         NOT TESTED
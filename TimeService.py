@@ -0,0 +1,123 @@
+import machine
+import utime
+from Logging import Logger
+from GNSSFix import FIX_UTC, fix_time
+
+# minimum time in s over which the drift is measured, so that offsets in whole seconds are precise enough
+DRIFT_MIN_INTERVAL = 21600
+
+class TimeService:
+    def __init__(self, modem, ntp_server:str, tz_offset:int, max_drift:int=2, drift_ppm:int=50):
+        """Initializes the time service, which keeps the RTC on UTC
+
+        Time sources in order of preference:
+        - GNSS UTC of a fix, polled or streamed (see update_from_gnss)
+        - network time, announced by *PSUTTZ/+CTZV unsolicited responses (requires SIM7080g.enable_network_time)
+        - NTP, only if the estimated RTC drift exceeds max_drift
+
+        Args:
+            modem (SIM7080g): modem used to query the time
+            ntp_server (str): NTP server url
+            tz_offset (int): Timezone offset in hours (e.g. +2 or -3)
+            max_drift (int, optional): maximum estimated RTC drift in s before NTP is used. Defaults to 2.
+            drift_ppm (int, optional): assumed RTC drift in ppm, lower bound of the measured drift. Defaults to 50.
+        """
+        self.modem = modem
+        self.ntp_server = ntp_server
+        self.tz_offset = tz_offset
+        self.max_drift = max_drift
+        self.logger = Logger("TimeService")
+        self._last_sync = None
+        self._min_drift_rate = drift_ppm / 1000000
+        self._drift_rate = self._min_drift_rate
+        self._drift_start = None
+        self._drift_sum = 0
+
+    def update(self, utc:int, source:str):
+        """Set the RTC from a reference time and update the measured drift
+
+        Args:
+            utc (int): reference UTC time in seconds since epoch (see utime.time)
+            source (str): name of the time source (for logging)
+        """
+        now = utime.time()
+        offset = utc - now
+
+        # drift is measured as the sum of all corrections over at least DRIFT_MIN_INTERVAL, smoothed and
+        # bounded by drift_ppm (a single offset of 0 or 1 s says little about the rate)
+        if self._drift_start is None:
+            self._drift_start = utc
+            self._drift_sum = 0
+        else:
+            self._drift_sum += offset
+            if now - self._drift_start >= DRIFT_MIN_INTERVAL:
+                measured = abs(self._drift_sum) / (now - self._drift_start)
+                self._drift_rate = max(self._min_drift_rate, (self._drift_rate + measured) / 2)
+                self._drift_start = utc
+                self._drift_sum = 0
+
+        if offset != 0:
+            t = utime.gmtime(utc)
+            machine.RTC().datetime((t[0], t[1], t[2], t[6], t[3], t[4], t[5], 0))
+
+        self._last_sync = utc
+        self.logger.debug(f"Time from {source}: offset {offset} s, drift {self._drift_rate*1000000:.0f} ppm")
+
+    def update_from_gnss(self, fix:tuple):
+        """Set the RTC from the UTC time of a GNSS fix
+
+        Args:
+            fix (tuple): fix (see GNSSFix.FIX_* constants)
+
+        Returns:
+            bool: True if the RTC was updated, False otherwise
+        """
+        if (fix is None) or (fix[FIX_UTC] is None) or (len(fix[FIX_UTC]) < 14):
+            return False
+
+        self.update(fix_time(fix), "GNSS")
+        return True
+
+    def estimated_drift(self):
+        """Get the estimated RTC drift since the last reference
+
+        Returns:
+            float: estimated drift in s or -1 if the RTC was never set
+        """
+        if self._last_sync is None:
+            return -1
+        return self._drift_rate * (utime.time() - self._last_sync)
+
+    def sync(self):
+        """Sync the RTC from the cheapest available source
+
+        Returns:
+            bool: True if the RTC is within max_drift, False otherwise
+        """
+        # the modem has already set its clock from the network, reading it back is local
+        if self.modem.at_adap.pop_unsolicited_responses("*PSUTTZ:") + self.modem.at_adap.pop_unsolicited_responses("+CTZV:"):
+            utc = self.modem.get_clock()
+            if utc != -1:
+                self.update(utc, "network")
+
+        drift = self.estimated_drift()
+        if (drift != -1) and (drift <= self.max_drift):
+            return True
+
+        self.logger.info("No recent time reference, falling back to NTP.")
+        return self.sync_ntp()
+
+    def sync_ntp(self):
+        """Sync the RTC via NTP, regardless of the estimated drift
+
+        Returns:
+            bool: True if the RTC was set, False otherwise
+        """
+        if self.modem.sync_NTP_time(self.ntp_server, self.tz_offset):
+            utc = self.modem.get_clock()
+            if utc != -1:
+                self.update(utc, "NTP")
+                return True
+
+        self.logger.warning("Failed to set Time")
+        return False
@@ -0,0 +1,104 @@
+"""Benchmark of the host-side report decoder and trajectory analytics on synthetic reports.
+
+Usage:
+    python benchmarks/bench_analytics.py [--reports 2000000] [--devices 1000] [--decode-reports 200000]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tracker_analytics import NO_CELL, Reports, decode, device_stats
+
+
+def synthetic_reports(n_reports:int, n_devices:int, seed:int=0):
+    """Generates random walk trajectories with cell handovers and delta reported network info
+    """
+    rng = np.random.default_rng(seed)
+    device = rng.integers(0, n_devices, n_reports).astype(np.int32)
+    device.sort(kind="stable")
+    t = 1704067200 + np.arange(n_reports) * 60.0 + rng.uniform(0, 5, n_reports)
+
+    moving = rng.random(n_reports) < 0.6
+    lat = 48.0 + np.cumsum(np.where(moving, rng.normal(0, 0.002, n_reports), 0.0))
+    lon = 11.0 + np.cumsum(np.where(moving, rng.normal(0, 0.002, n_reports), 0.0))
+    no_fix = rng.random(n_reports) < 0.05
+    lat[no_fix] = np.nan
+    lon[no_fix] = np.nan
+
+    cell = 1000 + np.cumsum(rng.random(n_reports) < 0.1)
+    unchanged = np.r_[False, (cell[1:] == cell[:-1]) & (device[1:] == device[:-1])]
+    cell = np.where(unchanged, NO_CELL, cell).astype(np.int64)
+
+    return Reports([f"tracker-{i}" for i in range(n_devices)], device, t, lat, lon, cell)
+
+
+def to_json_lines(reports:Reports):
+    """Serializes reports as recorded by the IoT rule (see tracker_analytics.decode)
+    """
+    lines = []
+    for i in range(len(reports)):
+        reported = {}
+        if not math.isnan(reports.lat[i]):
+            utc = time.strftime("%Y%m%d%H%M%S", time.gmtime(reports.t[i])) + ".000"
+            reported["gnss"] = {"utc": utc, "lat": float(reports.lat[i]), "lon": float(reports.lon[i])}
+        if reports.cell[i] != NO_CELL:
+            reported["network_info"] = {"SCellID": int(reports.cell[i])}
+        lines.append(json.dumps({
+            "device": reports.devices[reports.device[i]],
+            "timestamp": int(reports.t[i] * 1000),
+            "state": {"reported": reported}}))
+    return lines
+
+
+def per_message_distance(lines):
+    """Baseline: parse one message at a time and accumulate the distance per device in Python
+    """
+    last = {}
+    distance = {}
+    for line in lines:
+        doc = json.loads(line)
+        gnss = doc["state"]["reported"].get("gnss")
+        if not gnss:
+            continue
+        prev = last.get(doc["device"])
+        if prev is not None:
+            lat1, lon1, lat2, lon2 = map(math.radians, (prev[0], prev[1], gnss["lat"], gnss["lon"]))
+            a = math.sin((lat2-lat1)/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2-lon1)/2)**2
+            distance[doc["device"]] = distance.get(doc["device"], 0.0) + 2 * 6371008.8 * math.asin(math.sqrt(a))
+        last[doc["device"]] = (gnss["lat"], gnss["lon"])
+    return distance
+
+
+def timed(label:str, n:int, func, *args):
+    t0 = time.perf_counter()
+    res = func(*args)
+    dt = time.perf_counter() - t0
+    print(f"{label:40s} {dt:8.3f} s  {n/dt/1e6:8.2f} M reports/s")
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=2000000)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--decode-reports", type=int, default=200000)
+    args = parser.parse_args()
+
+    reports = synthetic_reports(args.reports, args.devices)
+    timed("device_stats (vectorized)", len(reports), device_stats, reports)
+
+    lines = to_json_lines(synthetic_reports(args.decode_reports, args.devices, seed=1))
+    decoded = timed("decode jsonl", len(lines), decode, lines)
+    timed("device_stats on decoded", len(decoded), device_stats, decoded)
+    timed("per-message distance (baseline)", len(lines), per_message_distance, lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark of the backlog upload paths (MQTT per report vs. HTTPS bulk) on synthetic reports.
+
+The modem is modelled from the AT sequences the firmware sends: UART transfer at the
+configured baud rate (payloads are written in 100 byte chunks with 100 ms pauses, see
+ATadapter), a fixed latency per AT command, the connection setup and the afterrun of
++SHREQ. Payloads are the real encodings of the firmware (shadow update per MQTT message,
+zlib compressed batch per HTTPS request, see BulkUploader).
+
+Usage:
+    python benchmarks/bench_upload.py [--backlog 10 100 500] [--baud 9600]
+"""
+import argparse
+import json
+import random
+import zlib
+
+AT_LATENCY = 0.05       # s per AT command (local round trip)
+TLS_CONNECT = 2.0       # s for +SMCONN/+SHCONN
+SHREQ_AFTERRUN = 5.0    # s, see SIM7080g.http_post
+CHUNK = 100             # bytes per UART write, see ATadapter.AT_CMD_DATA_CHUNK
+CHUNK_PAUSE = 0.1       # s after each chunk, see ATadapter.AT_CMD_DATA_PAUSE
+MAX_BODY = 4096         # bytes, +SHCONF "BODYLEN"
+TOPIC = "$aws/things/tracker-0/shadow/name/Default/update"
+
+
+def synthetic_backlog(n:int, seed:int=0):
+    """Generates reports as the track state adds them to the backlog
+    """
+    rng = random.Random(seed)
+    lat, lon, cell = 48.0, 11.0, 1000
+    reports = []
+    for i in range(n):
+        lat += rng.gauss(0, 0.002)
+        lon += rng.gauss(0, 0.002)
+        reported = {"gnss": {"utc": f"20240101{i//3600%24:02d}{i//60%60:02d}{i%60:02d}.000", "lat": round(lat, 6), "lon": round(lon, 6),
+                             "alt": round(rng.uniform(400, 600), 1), "speed": round(rng.uniform(0, 90), 2), "course": round(rng.uniform(0, 360), 1),
+                             "sats": rng.randint(4, 12), "hdop": round(rng.uniform(0.6, 2.5), 1), "mode": 3}}
+        network_info = {"RSRQ": rng.randint(-15, -5), "RSRP": rng.randint(-110, -70), "RSSI": rng.randint(-80, -50), "RSSNR": rng.randint(0, 20)}
+        if rng.random() < 0.1:
+            cell += 1
+            network_info.update({"SCellID": cell, "eNBID": cell >> 8, "SectorID": cell & 0xFF})
+        reported["network_info"] = network_info
+        reported["ts"] = 1704067200 + 60*i
+        reports.append(json.dumps(reported))
+    return reports
+
+
+def uart_time(n_bytes:int, baud:int, chunked:bool=False):
+    """Time to transfer n_bytes over the UART (10 bits per byte)
+    """
+    t = n_bytes * 10 / baud
+    if chunked:
+        t = max(t, (n_bytes // CHUNK + 1) * CHUNK_PAUSE)
+    return t
+
+
+def at_time(line:str, baud:int):
+    return AT_LATENCY + uart_time(len(line) + 8, baud)   # + "AT", "\r\n" and "OK\r\n"
+
+
+def mqtt_upload(reports:list, baud:int):
+    """Models send_mqtt() per report over one MQTT connection
+
+    Returns:
+        tuple: (time in s, payload bytes)
+    """
+    t = TLS_CONNECT + at_time("+SMCONN", baud)
+    n_bytes = 0
+    for report in reports:
+        content = '{"state": {"reported": ' + report + '}}'
+        t += at_time(f'+SMPUB="{TOPIC}",{len(content)},0,0', baud) + uart_time(len(content), baud, True)
+        n_bytes += len(content)
+    return t + at_time("+SMDISC", baud), n_bytes
+
+
+def encode_batch(reports:list):
+    """Encodes a batch like BulkUploader (zlib, 1 KB window)
+    """
+    body = ('{"reports": [' + ", ".join(reports) + ']}').encode()
+    c = zlib.compressobj(wbits=10)
+    return c.compress(body) + c.flush()
+
+
+def https_upload(reports:list, baud:int, max_batch:int=100):
+    """Models BulkUploader.upload() over one HTTPS connection
+
+    Returns:
+        tuple: (time in s, payload bytes)
+    """
+    t = 4 * at_time('+SHCONF="URL","https://x-ats.iot.eu-central-1.amazonaws.com:8443"', baud) + TLS_CONNECT + at_time("+SHCONN", baud)
+    n_bytes = 0
+    uploaded = 0
+    n = max_batch
+    while uploaded < len(reports):
+        body = encode_batch(reports[uploaded:uploaded+n])
+        if (len(body) > MAX_BODY) and (n > 1):
+            n = n // 2
+            continue
+        t += at_time("+SHCHEAD", baud) + 2 * at_time('+SHAHEAD="Content-Type","application/json"', baud)
+        t += at_time(f"+SHBOD={len(body)},10000", baud) + uart_time(len(body), baud, True)
+        t += at_time('+SHREQ="/topics/tracker-0/reports/batch?qos=1",3', baud) + SHREQ_AFTERRUN
+        n_bytes += len(body)
+        uploaded += len(reports[uploaded:uploaded+n])
+    return t + at_time("+SHDISC", baud), n_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backlog", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--baud", type=int, default=9600)
+    args = parser.parse_args()
+
+    print(f"{'backlog':>8s} {'path':>6s} {'time':>9s} {'reports/s':>10s} {'bytes/report':>13s}")
+    for n in args.backlog:
+        reports = synthetic_backlog(n)
+        for name, upload in (("mqtt", mqtt_upload), ("https", https_upload)):
+            t, n_bytes = upload(reports, args.baud)
+            print(f"{n:8d} {name:>6s} {t:8.1f}s {n/t:10.2f} {n_bytes/n:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
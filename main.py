@@ -1,6 +1,18 @@
+import utime
+boot_ticks = utime.ticks_ms()
+import gc
 from GPSTrackerStateMachine import GPSTrackerStateMachine
 
+# Measure startup (import time and free heap after import), reported with the first update
+gc.collect()
+boot_stats = {
+    "ticks": boot_ticks,
+    "import_ms": utime.ticks_diff(utime.ticks_ms(), boot_ticks),
+    "mem_free": gc.mem_free()
+}
+print(f"Startup: imports {boot_stats['import_ms']} ms, free heap {boot_stats['mem_free']} bytes")
+
 # Initialize and run the state machine
-tracker = GPSTrackerStateMachine()
+tracker = GPSTrackerStateMachine(boot_stats)
 tracker.transition('boot')
-tracker.run()
\ No newline at end of file
+tracker.run()
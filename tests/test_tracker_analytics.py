@@ -0,0 +1,78 @@
+import base64
+import calendar
+import json
+import zlib
+
+import numpy as np
+
+from tracker_analytics import NO_CELL, decode, decode_batch, device_stats, forward_fill_cells
+from tracker_analytics.decode import parse_utc
+
+
+def record(device, t, lat=None, lon=None, cell=None):
+    reported = {"ts": t}
+    if lat is not None:
+        reported["gnss"] = {"lat": lat, "lon": lon}
+    if cell is not None:
+        reported["network_info"] = {"SCellID": cell}
+    return json.dumps({"device": device, "timestamp": 0, "state": {"reported": reported}})
+
+
+def test_parse_utc_matches_timegm():
+    utc = np.array(["20240114170832.250", "20240229235959.999", "20000101000000", "19700101000000.000"], dtype="U18")
+    expected = [
+        calendar.timegm((2024, 1, 14, 17, 8, 32)) + 0.25,
+        calendar.timegm((2024, 2, 29, 23, 59, 59)) + 0.999,
+        calendar.timegm((2000, 1, 1, 0, 0, 0)),
+        0.0,
+    ]
+    np.testing.assert_allclose(parse_utc(utc), expected, rtol=0, atol=1e-6)
+
+
+def test_decode_batch_zlib_and_plain():
+    reports = [{"ts": 1705252100, "gnss": {"lat": 52.5, "lon": 13.4}}, {"ts": 1705252160, "network_info": {"SCellID": 7}}]
+    body = json.dumps({"reports": reports}).encode()
+    c = zlib.compressobj(wbits=10)
+    compressed = c.compress(body) + c.flush()
+
+    for b in (body, compressed):
+        r = decode_batch("tracker-0", b).build()
+        assert r.devices == ["tracker-0"]
+        np.testing.assert_array_equal(r.t, [1705252100, 1705252160])
+        np.testing.assert_array_equal(r.cell, [NO_CELL, 7])
+        assert r.lat[0] == 52.5 and np.isnan(r.lat[1])
+
+    # bulk records in a recording
+    line = json.dumps({"device": "tracker-0", "timestamp": 0, "batch": base64.b64encode(compressed).decode()})
+    assert len(decode([line])) == 2
+
+
+def test_forward_fill_cells_stops_at_device_boundaries():
+    r = decode([
+        record("a", 1, cell=10),
+        record("a", 2),
+        record("a", 3, cell=11),
+        record("b", 1),
+        record("b", 2, cell=20),
+        record("b", 3),
+    ])
+    np.testing.assert_array_equal(forward_fill_cells(r), [10, 10, 11, NO_CELL, 20, 20])
+
+
+def test_device_stats_empty():
+    stats = device_stats(decode([]))
+    for values in stats.values():
+        assert len(values) == 0
+
+
+def test_device_stats_single_fix():
+    stats = device_stats(decode([
+        record("a", 0, 52.50, 13.40),
+        record("a", 100, 52.51, 13.40),
+        record("b", 0, 48.0, 11.0),
+    ]))
+    np.testing.assert_array_equal(stats["reports"], [2, 1])
+    np.testing.assert_allclose(stats["distance"], [1111.95, 0.0], atol=0.1)
+    np.testing.assert_array_equal(stats["duration"], [100.0, 0.0])
+    assert stats["mean_speed"][1] == 0.0 and stats["max_speed"][1] == 0.0
+    np.testing.assert_array_equal(stats["handovers"], [0, 0])
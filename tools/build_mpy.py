@@ -0,0 +1,63 @@
+"""Precompiles the firmware modules to .mpy files, so MicroPython does not compile them on every boot.
+
+The output directory contains main.py (MicroPython only runs main.py as source) and one .mpy
+file per firmware module; copy its content to the Pico, e.g. with `mpremote cp -r build/* :`.
+Requires mpy-cross (`pip install mpy-cross`, matching the MicroPython version of the firmware).
+
+For a firmware with the modules frozen into flash, use tools/manifest.py instead.
+
+Usage:
+    python tools/build_mpy.py [--out build] [-O 2]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+FIRMWARE_MODULES = [
+    "ATadapter.py",
+    "BulkUploader.py",
+    "Geofence.py",
+    "GNSSFix.py",
+    "GPSTrackerStateMachine.py",
+    "Logging.py",
+    "NetworkInfo.py",
+    "NMEA.py",
+    "SIM7080g.py",
+    "TimeService.py",
+]
+
+
+def mpy_cross_command():
+    """Get the mpy-cross command, preferring the pip package over a binary on PATH
+    """
+    try:
+        import mpy_cross
+        return [sys.executable, "-m", "mpy_cross"]
+    except ImportError:
+        pass
+    if shutil.which("mpy-cross"):
+        return ["mpy-cross"]
+    sys.exit("mpy-cross not found, install it with `pip install mpy-cross`")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=os.path.join(ROOT, "build"))
+    parser.add_argument("-O", dest="opt", type=int, default=2, help="optimisation level (2 strips asserts and line numbers)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    cmd = mpy_cross_command()
+    for module in FIRMWARE_MODULES:
+        out = os.path.join(args.out, module[:-3] + ".mpy")
+        subprocess.run(cmd + [f"-O{args.opt}", "-o", out, os.path.join(ROOT, module)], check=True)
+        print(f"{module:28s} -> {os.path.relpath(out)} ({os.path.getsize(out)} bytes)")
+    shutil.copy(os.path.join(ROOT, "main.py"), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# Freezes the firmware modules into a custom MicroPython build for the Pico, so their
+# bytecode runs from flash and does not use heap:
+#   make -C ports/rp2 BOARD=RPI_PICO FROZEN_MANIFEST=<repo>/tools/manifest.py
+include("$(PORT_DIR)/boards/manifest.py")
+
+module("ATadapter.py", base_path="..", opt=2)
+module("BulkUploader.py", base_path="..", opt=2)
+module("Geofence.py", base_path="..", opt=2)
+module("GNSSFix.py", base_path="..", opt=2)
+module("GPSTrackerStateMachine.py", base_path="..", opt=2)
+module("Logging.py", base_path="..", opt=2)
+module("NetworkInfo.py", base_path="..", opt=2)
+module("NMEA.py", base_path="..", opt=2)
+module("SIM7080g.py", base_path="..", opt=2)
+module("TimeService.py", base_path="..", opt=2)
@@ -0,0 +1,4 @@
+"""Host-side decoding and analytics of GPS-Tracker reports (CPython, requires NumPy).
+"""
+from .decode import DECODERS, NO_CELL, ColumnBuilder, Reports, decode, decode_batch, decode_file, decode_json_lines
+from .analytics import device_stats, forward_fill_cells, haversine, segments, sort_reports
@@ -0,0 +1,111 @@
+"""Vectorized per-device trajectory analytics on decoded tracker reports.
+"""
+import numpy as np
+
+from .decode import NO_CELL, Reports
+
+EARTH_RADIUS = 6371008.8
+
+
+def sort_reports(reports:Reports):
+    """Sorts reports by device and time
+
+    Args:
+        reports (Reports): decoded reports
+
+    Returns:
+        Reports: sorted reports
+    """
+    return reports.take(np.lexsort((reports.t, reports.device)))
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great circle distance in m between arrays of positions in degrees
+    """
+    lat1, lon1, lat2, lon2 = np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2)
+    a = np.sin((lat2-lat1)/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2-lon1)/2)**2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def forward_fill_cells(reports:Reports):
+    """Fills reports without a cell ID with the last reported cell ID of the same device
+    (the firmware only reports network info fields that changed)
+
+    Args:
+        reports (Reports): reports, sorted by device and time
+
+    Returns:
+        np.ndarray: cell ID per report, NO_CELL before the first reported cell of a device
+    """
+    n = len(reports)
+    valid = reports.cell != NO_CELL
+    start = np.ones(n, dtype=bool)
+    start[1:] = reports.device[1:] != reports.device[:-1]
+
+    # index of the last valid row, bounded by the first row of the device
+    idx = np.where(valid | start, np.arange(n), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return np.where(valid[idx], reports.cell[idx], NO_CELL)
+
+
+def segments(reports:Reports):
+    """Splits the trajectories into segments between consecutive fixes of the same device
+
+    Args:
+        reports (Reports): reports, sorted by device and time
+
+    Returns:
+        tuple: (device, distance in m, duration in s) per segment
+    """
+    fixes = reports.take(~np.isnan(reports.lat) & ~np.isnan(reports.lon))
+    same = fixes.device[1:] == fixes.device[:-1]
+    distance = haversine(fixes.lat[:-1], fixes.lon[:-1], fixes.lat[1:], fixes.lon[1:])[same]
+    duration = (fixes.t[1:] - fixes.t[:-1])[same]
+    return fixes.device[:-1][same], distance, duration
+
+
+def device_stats(reports:Reports, dwell_speed:float=0.5):
+    """Computes distance, speed, dwell time and cell handovers per device
+
+    A segment counts as dwelling if its mean speed is below dwell_speed.
+
+    Args:
+        reports (Reports): decoded reports
+        dwell_speed (float, optional): speed in m/s below which a segment counts as dwelling. Defaults to 0.5.
+
+    Returns:
+        dict of np.ndarray: per device (indexed by device code): "reports", "distance" (m),
+            "duration" (s), "mean_speed" (m/s), "max_speed" (m/s), "dwell" (s), "handovers"
+    """
+    reports = sort_reports(reports)
+    n_devices = len(reports.devices)
+
+    device, distance, duration = segments(reports)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(duration > 0, distance / duration, 0.0)
+
+    total_distance = np.bincount(device, weights=distance, minlength=n_devices)
+    total_duration = np.bincount(device, weights=duration, minlength=n_devices)
+    dwell = np.bincount(device, weights=np.where(speed < dwell_speed, duration, 0.0), minlength=n_devices)
+
+    max_speed = np.zeros(n_devices)
+    if len(device):
+        starts = np.flatnonzero(np.r_[True, device[1:] != device[:-1]])
+        max_speed[device[starts]] = np.maximum.reduceat(speed, starts)
+
+    cell = forward_fill_cells(reports)
+    handover = (reports.device[1:] == reports.device[:-1]) & (cell[:-1] != NO_CELL) & (cell[1:] != cell[:-1])
+    handovers = np.bincount(reports.device[1:][handover], minlength=n_devices)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_speed = np.where(total_duration > 0, total_distance / total_duration, 0.0)
+
+    return {
+        "reports": np.bincount(reports.device, minlength=n_devices),
+        "distance": total_distance,
+        "duration": total_duration,
+        "mean_speed": mean_speed,
+        "max_speed": max_speed,
+        "dwell": dwell,
+        "handovers": handovers,
+    }
@@ -0,0 +1,230 @@
+"""Bulk decoding of recorded tracker report streams into columnar NumPy arrays.
+
+A recorded stream is a sequence of shadow update documents as published by the
+firmware's track state, each extended by the receiving IoT rule with the device
+name and the receive timestamp (ms since epoch):
+
+    {"device": "<client-id>", "timestamp": 1705252112000,
+     "state": {"reported": {"ts": 1705252100, "gnss": {...}, "network_info": {...}}}}
+
+"ts" is the creation time of the report on the device (s since epoch), which differs
+from the receive time for reports delivered from the device's backlog.
+
+Backlogs uploaded in bulk via HTTPS arrive as one record per request, with the
+request body (zlib compressed JSON, see BulkUploader) base64 encoded by the rule.
+The body lists the "reported" sections, each including "ts":
+
+    {"device": "<client-id>", "timestamp": 1705252112000, "batch": "eJzt..."}
+"""
+import base64
+import json
+import zlib
+
+import numpy as np
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+NO_CELL = -1
+
+
+class Reports:
+    def __init__(self, devices, device, t, lat, lon, cell):
+        """Columnar tracker reports, one row per report
+
+        Args:
+            devices (list of str): device names, indexed by the device codes
+            device (np.ndarray): device code per report (int32)
+            t (np.ndarray): report time in s since epoch, GNSS time if available (float64)
+            lat (np.ndarray): latitude in degrees, NaN if the report has no fix (float64)
+            lon (np.ndarray): longitude in degrees, NaN if the report has no fix (float64)
+            cell (np.ndarray): serving cell ID, NO_CELL if not reported (int64)
+        """
+        self.devices = devices
+        self.device = device
+        self.t = t
+        self.lat = lat
+        self.lon = lon
+        self.cell = cell
+
+    def __len__(self):
+        return len(self.t)
+
+    def __repr__(self) -> str:
+        return f"Reports(devices: {len(self.devices)}, reports: {len(self)})"
+
+    def take(self, index):
+        """Get a subset of the reports
+
+        Args:
+            index (np.ndarray): row indices or boolean mask
+
+        Returns:
+            Reports: selected reports, sharing the device names
+        """
+        return Reports(self.devices, self.device[index], self.t[index], self.lat[index], self.lon[index], self.cell[index])
+
+
+class ColumnBuilder:
+    def __init__(self):
+        """Collects decoded reports row by row and converts them to a Reports object
+        """
+        self._codes = {}
+        self.devices = []
+        self.device = []
+        self.t = []
+        self.lat = []
+        self.lon = []
+        self.cell = []
+        self.utc = []
+
+    def add(self, device:str, timestamp:float, reported:dict):
+        """Adds one report
+
+        Args:
+            device (str): device name
+            timestamp (float): receive time in s since epoch, used if the report has neither GNSS time nor "ts"
+            reported (dict): "reported" section of the shadow update document
+        """
+        code = self._codes.get(device)
+        if code is None:
+            code = self._codes[device] = len(self.devices)
+            self.devices.append(device)
+        self.device.append(code)
+
+        self.t.append(reported.get("ts", timestamp))
+        gnss = reported.get("gnss")
+        if gnss:
+            self.utc.append(gnss.get("utc", ""))
+            self.lat.append(gnss.get("lat", np.nan))
+            self.lon.append(gnss.get("lon", np.nan))
+        else:
+            self.utc.append("")
+            self.lat.append(np.nan)
+            self.lon.append(np.nan)
+
+        network_info = reported.get("network_info")
+        cell = NO_CELL
+        if network_info:
+            cell = network_info.get("SCellID", network_info.get("Cell ID", NO_CELL))
+        self.cell.append(int(cell))
+
+    def build(self):
+        """Converts the collected rows to arrays
+
+        Returns:
+            Reports: decoded reports
+        """
+        t = np.array(self.t, dtype=np.float64)
+        utc = np.array(self.utc, dtype="U18")
+        has_utc = np.char.str_len(utc) >= 14
+        t[has_utc] = parse_utc(utc[has_utc])
+
+        return Reports(
+            self.devices,
+            np.array(self.device, dtype=np.int32),
+            t,
+            np.array(self.lat, dtype=np.float64),
+            np.array(self.lon, dtype=np.float64),
+            np.array(self.cell, dtype=np.int64),
+        )
+
+
+def parse_utc(utc:np.ndarray):
+    """Converts GNSS UTC times ("yyyyMMddhhmmss.sss") to s since epoch
+
+    Args:
+        utc (np.ndarray): UTC times (dtype "U18", at least 14 characters each)
+
+    Returns:
+        np.ndarray: s since epoch (float64)
+    """
+    # unicode code points of each character, "0" --> 0
+    d = utc.astype("U18").view(np.uint32).reshape(-1, 18).astype(np.int64) - ord("0")
+    year = d[:, 0]*1000 + d[:, 1]*100 + d[:, 2]*10 + d[:, 3]
+    month = d[:, 4]*10 + d[:, 5]
+    day = d[:, 6]*10 + d[:, 7]
+    days = ((year-1970).astype("M8[Y]") + (month-1).astype("m8[M]")).astype("M8[D]").astype(np.int64) + day - 1
+    seconds = (d[:, 8]*10 + d[:, 9])*3600 + (d[:, 10]*10 + d[:, 11])*60 + d[:, 12]*10 + d[:, 13]
+    frac = np.where(d[:, 15:18] >= 0, d[:, 15:18], 0) @ np.array([0.1, 0.01, 0.001])
+    return days*86400.0 + seconds + frac
+
+
+def decode_json_lines(lines, builder:ColumnBuilder=None):
+    """Decodes a recorded stream of JSON reports, one document per line
+
+    Args:
+        lines (iterable of str or bytes): JSON documents
+        builder (ColumnBuilder, optional): builder to add the reports to. Defaults to a new one.
+
+    Returns:
+        ColumnBuilder: builder containing the decoded reports
+    """
+    builder = ColumnBuilder() if builder is None else builder
+    loads = _loads
+    add = builder.add
+    for line in lines:
+        if not line.strip():
+            continue
+        doc = loads(line)
+        if "batch" in doc:
+            decode_batch(doc["device"], base64.b64decode(doc["batch"]), builder)
+        else:
+            add(doc["device"], doc["timestamp"] / 1000, doc["state"]["reported"])
+    return builder
+
+
+def decode_batch(device:str, body:bytes, builder:ColumnBuilder=None):
+    """Decodes the body of a bulk upload request
+
+    Args:
+        device (str): device name
+        body (bytes): request body, zlib compressed or plain JSON
+        builder (ColumnBuilder, optional): builder to add the reports to. Defaults to a new one.
+
+    Returns:
+        ColumnBuilder: builder containing the decoded reports
+    """
+    builder = ColumnBuilder() if builder is None else builder
+    # zlib header: compression method 8 (deflate), any window size
+    if (body[0] & 0x0F == 8) and ((body[0] << 8 | body[1]) % 31 == 0):
+        body = zlib.decompress(body)
+    add = builder.add
+    for report in _loads(body)["reports"]:
+        # older firmware wrapped each report as {"ts": ..., "reported": {...}}
+        add(device, report["ts"], report.get("reported", report))
+    return builder
+
+
+DECODERS = {
+    "jsonl": decode_json_lines,
+}
+
+
+def decode(lines, fmt:str="jsonl"):
+    """Decodes a recorded report stream into columnar arrays
+
+    Args:
+        lines (iterable): records of the stream
+        fmt (str, optional): stream format, one of DECODERS. Defaults to "jsonl".
+
+    Returns:
+        Reports: decoded reports
+    """
+    return DECODERS[fmt](lines).build()
+
+
+def decode_file(path:str, fmt:str="jsonl"):
+    """Decodes a recorded report stream from a file
+
+    Args:
+        path (str): path of the recording
+        fmt (str, optional): stream format, one of DECODERS. Defaults to "jsonl".
+
+    Returns:
+        Reports: decoded reports
+    """
+    with open(path, "rb") as f:
+        return decode(f, fmt)